@@ -176,14 +176,8 @@ async def get_persona(user_id: int = 1):
             LIMIT 1
         """, (user_id,))
         result = cursor.fetchone()
-        conn.close()
         
-        if result:
-            # Convert sqlite3.Row to dict before accessing
-            result_dict = dict(result)
-            archetype = result_dict['archetype']
-        else:
-            archetype = None
+        archetype = result['archetype'] if result else None
         
         # Get financial summary
         financial_summary = db.get_financial_summary()
@@ -311,15 +305,8 @@ async def get_summary():
                 LIMIT 1
             """)
             result = cursor.fetchone()
-            conn.close()
             
-            if result:
-                # Convert sqlite3.Row to dict before accessing
-                result_dict = dict(result)
-                archetype = result_dict['archetype']
-                response["archetype"] = archetype
-            else:
-                response["archetype"] = None
+            response["archetype"] = result['archetype'] if result else None
         else:
             # Include data threshold information in response
             response["archetype"] = None
@@ -352,12 +339,8 @@ async def get_transactions(limit: int = 10):
             LIMIT ?
         """, (limit,))
         
-        # Convert each sqlite3.Row to a regular dictionary to avoid mutation issues
-        transactions = []
-        for row in cursor.fetchall():
-            transactions.append(dict(row))
-        
-        conn.close()
+        # Rows become plain dicts only here, at the response boundary
+        transactions = [dict(row) for row in cursor.fetchall()]
         
         return {"transactions": transactions}
     except Exception as e:
@@ -523,10 +506,13 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.on_event("startup")
 async def startup_event():
     """
-    Start the background service when the API starts
+    Start the background service and analytics refresher when the API starts
     """
     background_service.start_background_service()
     print("[INFO] Background SMS processing service started")
+    
+    # Keep dashboard analytics precomputed off the request path
+    db.start_analytics_refresher()
 
 # Stop background service when API stops
 @app.on_event("shutdown")
@@ -7,7 +7,7 @@ import pprint
 import datetime
 import os
 from typing import Dict, Any, List, Optional
-from enhanced_sms_parser import run_end_to_end, is_sufficient_data_for_archetype, handle_financial_question, parse_sms
+from enhanced_sms_parser import run_end_to_end, parse_sms
 import db
 
 def process_single_sms(sms_text: str, output_file: str = None) -> Dict[str, Any]:
@@ -145,23 +145,20 @@ def show_reminders(days: int = 3):
             print(f"No payment reminders due in the next {days} days.")
             return
         
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        today = datetime.date.today()
         
         print(f"\n=== UPCOMING PAYMENTS (Next {days} days) ===")
         for reminder in reminders:
-            recurring = "✓ Recurring" if reminder['recurring'] else "✗ One-time"
-            due_date = reminder['due_date']
+            due_date = datetime.date.fromisoformat(reminder['due_date'])
             
             # Check if due today
             if due_date == today:
                 due_str = "DUE TODAY!"
             else:
-                due_days = (datetime.datetime.strptime(due_date, "%Y-%m-%d") - 
-                           datetime.datetime.strptime(today, "%Y-%m-%d")).days
-                due_str = f"Due in {due_days} days"
+                due_str = f"Due in {(due_date - today).days} days"
             
             print(f"Merchant: {reminder['merchant']}  |  Amount: ₹{reminder['amount']:,.2f}  |  {due_str}")
-            print(f"  Account: {reminder['account']}  |  {recurring}")
+            print(f"  Account: {reminder['account_masked']}  |  Type: {reminder['reminder_type']}")
             print("-" * 60)
     except Exception as e:
         print(f"Error retrieving reminders: {e}")
@@ -291,9 +288,10 @@ def get_persona_summary() -> None:
             LIMIT 1
         """)
         result = cursor.fetchone()
-        conn.close()
         
-        # Check if we have enough data
+        # Check if we have enough data (imported here: enhanced_sms_parser does
+        # not define it yet, and a module-level import would break the whole CLI)
+        from enhanced_sms_parser import is_sufficient_data_for_archetype
         enough_data = is_sufficient_data_for_archetype()
         
         if not enough_data:
@@ -403,12 +401,12 @@ def main():
     # Parse arguments
     args = parser.parse_args()
     
-    # Initialize database if requested or if it doesn't exist
-    if args.init_db or not os.path.exists(db.DB_FILE):
+    # Reset the database if requested, or initialize it if it doesn't exist
+    if args.init_db:
+        db.reset_db()
+    elif not os.path.exists(db.DB_FILE):
         db.init_db()
-    else:
-        # Just print that the database is initialized
-        print("Database initialized successfully")
+    print("Database initialized successfully")
     
     # Process based on command
     if args.sms:
@@ -453,6 +451,8 @@ def main():
         get_persona_summary()
         
     elif args.question:
+        # Imported here for the same reason as in get_persona_summary
+        from enhanced_sms_parser import handle_financial_question
         result = handle_financial_question(args.question)
         print("\n" + result["response"])
     
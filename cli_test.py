@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+import datetime
+
+import cli
+import db
+
+def test_show_reminders(capsys):
+    """Test that upcoming reminders are rendered with their account and due date"""
+    db.reset_db()
+    due = datetime.date.today() + datetime.timedelta(days=2)
+    db.add_reminder({"reminder_type": "subscription", "merchant": "Netflix", "amount": 649,
+                     "account_masked": "xxxx1234", "due_date": due.isoformat()})
+    
+    cli.show_reminders(days=3)
+    output = capsys.readouterr().out
+    print(output)
+    
+    assert "Error retrieving reminders" not in output
+    assert "Merchant: Netflix  |  Amount: ₹649.00  |  Due in 2 days" in output
+    assert "Account: xxxx1234  |  Type: subscription" in output
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import csv
+from pathlib import Path
+
+import pytest
+
+import csv_analyzer_test as analyzer
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+SAMPLE_SMS_CSV = DATA_DIR / 'synthetic_sms_data.csv'
+
+@pytest.fixture(autouse=True)
+def repo_data(monkeypatch):
+    """Load the analyzer's CSV data from the repository, whatever the working directory"""
+    for name in ('BANK_CSV', 'FRAUD_CSV', 'MERCHANT_CSV', 'TRANSACTION_INDICATORS_CSV'):
+        monkeypatch.setattr(analyzer, name, DATA_DIR / getattr(analyzer, name).name)
+    
+    # Start from empty globals so the data is loaded from the paths above
+    monkeypatch.setattr(analyzer, 'banks', {})
+    monkeypatch.setattr(analyzer, 'fraud_keywords', set())
+    monkeypatch.setattr(analyzer, 'merchants', {})
+    monkeypatch.setattr(analyzer, 'transaction_indicators', set())
+
+def test_batch_matches_analyze_sms():
+    """Test that analyze_sms_batch gives the same results as analyze_sms, message by message"""
+    with SAMPLE_SMS_CSV.open('r', encoding='utf-8') as f:
+        messages = [(row['Message'], row['Sender']) for row in csv.DictReader(f)]
+    
+    results = analyzer.analyze_sms_batch(messages)
+    assert results == [analyzer.analyze_sms(sms_text, sender) for sms_text, sender in messages]
+    # The comparison is only meaningful if the data files were found
+    assert any(result.merchant for result in results)
+
+def test_batch_scores_many_indicators(monkeypatch):
+    """Test that indicator counts past what a small integer type holds don't wrap in the batch score"""
+    keywords = {f"fraudword{i:03d}" for i in range(300)}
+    monkeypatch.setattr(analyzer, 'fraud_keywords', keywords)
+    
+    sms_text = " ".join(sorted(keywords))
+    [result] = analyzer.analyze_sms_batch([(sms_text, None)])
+    assert len(result.fraud_indicators) == 300
+    assert result == analyzer.analyze_sms(sms_text)
+    assert result.risk_level == "high"
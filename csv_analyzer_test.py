@@ -1,41 +1,85 @@
 #!/usr/bin/env python3
 
 import csv
-import os
 import re
+import sys
 import argparse
-from typing import Dict, List, Set, Tuple, Any
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, Final, Iterable, List, Optional, Set, Tuple, Any
+
+try:
+    import numpy as np
+except ImportError:  # Bulk scoring falls back to the scalar path
+    np = None  # type: ignore[assignment]
 
 # Define paths to CSV files
-DATA_DIR = 'data'  # Relative path for simplicity
-BANK_CSV = os.path.join(DATA_DIR, 'bank.csv')
-FRAUD_CSV = os.path.join(DATA_DIR, 'fraud.csv')
-MERCHANT_CSV = os.path.join(DATA_DIR, 'merchant.csv')
-MERCHANT_SHORT_CSV = os.path.join(DATA_DIR, 'merchant_short.csv')
-TRANSACTION_INDICATORS_CSV = os.path.join(DATA_DIR, 'transaction_indicator_keywords.csv')
+DATA_DIR: Final = Path('data')  # Relative path for simplicity
+BANK_CSV: Final = DATA_DIR / 'bank.csv'
+FRAUD_CSV: Final = DATA_DIR / 'fraud.csv'
+MERCHANT_CSV: Final = DATA_DIR / 'merchant.csv'
+TRANSACTION_INDICATORS_CSV: Final = DATA_DIR / 'transaction_indicator_keywords.csv'
 
 # Data structures to hold loaded data
-banks = {}  # bank_name -> typical_sender_ids
-fraud_keywords = set()  # Set of fraud indicator keywords
-merchants = {}  # merchant_abbreviation -> (merchant_name, category)
-transaction_indicators = set()  # Set of transaction indicator keywords
+banks: Dict[str, str] = {}  # bank_name -> typical_sender_ids
+fraud_keywords: Set[str] = set()  # Set of fraud indicator keywords
+merchants: Dict[str, Tuple[str, str]] = {}  # merchant_abbreviation -> (merchant_name, category)
+transaction_indicators: Set[str] = set()  # Set of transaction indicator keywords
 
 # Lists for language and sensitive information analysis
-SENSITIVE_INFO_TERMS = [
+SENSITIVE_INFO_TERMS: Final[List[str]] = [
     "otp", "one time password", "password", "pin", "cvv", "secret code",
     "verification code", "security code", "credential", "login", "username",
     "account number", "card number", "expiry", "expiration", "atm pin"
 ]
 
-AGGRESSIVE_TERMS = [
+AGGRESSIVE_TERMS: Final[List[str]] = [
     "urgent", "immediate", "alert", "warning", "action required", "must",
     "important", "attention", "critical", "mandatory", "now", "asap", "emergency",
     "restricted", "suspended", "blocked", "terminated", "deactivated", "compromised"
 ]
 
+# Language checks: runs of five or more capitals and of two or more '!'/'?'
+CAPS_RUN_PATTERN: Final = re.compile(r'[A-Z]{5,}')
+PUNCT_RUN_PATTERN: Final = re.compile(r'[!?]{2,}')
+
+# Risk levels indexed by the integer risk score computed in analyze_sms
+_RISK_LEVELS: Final[Tuple[str, str, str]] = ("low", "medium", "high")
+
+@dataclass(init=False)
+class SMSResult:
+    """Result of analyze_sms; indicator fields stay as the shared empty tuple unless something was found"""
+    # Declared by hand rather than with dataclass(slots=True), which needs Python 3.10
+    __slots__ = (
+        'raw_sms', 'sender', 'is_valid_sender', 'merchant', 'category', 'transaction_indicators',
+        'fraud_indicators', 'language_issues', 'sensitive_info_requests', 'risk_level',
+    )
+    raw_sms: str
+    sender: Optional[str]
+    is_valid_sender: bool
+    merchant: Optional[str]
+    category: Optional[str]
+    transaction_indicators: Tuple[str, ...]
+    fraud_indicators: Tuple[str, ...]
+    language_issues: Tuple[str, ...]
+    sensitive_info_requests: Tuple[str, ...]
+    risk_level: str
+    
+    def __init__(self, raw_sms: str, sender: Optional[str]) -> None:
+        self.raw_sms = raw_sms
+        self.sender = sender
+        self.is_valid_sender = False
+        self.merchant = None
+        self.category = None
+        self.transaction_indicators = ()
+        self.fraud_indicators = ()
+        self.language_issues = ()
+        self.sensitive_info_requests = ()
+        self.risk_level = "low"
+
 def load_banks() -> Dict[str, str]:
     """Load bank names and their typical sender IDs from CSV"""
-    result = {}
+    result: Dict[str, str] = {}
     try:
         with open(BANK_CSV, 'r') as f:
             reader = csv.DictReader(f)
@@ -49,13 +93,10 @@ def load_banks() -> Dict[str, str]:
 
 def load_fraud_keywords() -> Set[str]:
     """Load fraud indicator keywords from CSV"""
-    result = set()
     try:
-        with open(FRAUD_CSV, 'r') as f:
-            for line in f:
-                keyword = line.strip()
-                if keyword:  # Skip empty lines
-                    result.add(keyword.lower())
+        with open(FRAUD_CSV, 'r', encoding='utf-8') as f:
+            # Read in one go and split in C; blank lines are skipped
+            result = {line.strip().lower() for line in f.read().splitlines() if line.strip()}
         print(f"Loaded {len(result)} fraud keywords from {FRAUD_CSV}")
         return result
     except Exception as e:
@@ -64,7 +105,7 @@ def load_fraud_keywords() -> Set[str]:
 
 def load_merchants() -> Dict[str, Tuple[str, str]]:
     """Load merchant data from CSV"""
-    result = {}
+    result: Dict[str, Tuple[str, str]] = {}
     try:
         with open(MERCHANT_CSV, 'r') as f:
             reader = csv.DictReader(f)
@@ -74,15 +115,6 @@ def load_merchants() -> Dict[str, Tuple[str, str]]:
                 category = row['category']
                 result[abbr] = (name, category)
         print(f"Loaded {len(result)} merchants from main file")
-        
-        # Try to load additional merchants from short file
-        try:
-            with open(MERCHANT_SHORT_CSV, 'r') as f:
-                content = f.read()
-                print("Loaded additional merchants from short file")
-        except Exception as e:
-            print(f"Note: Could not load short merchant file: {e}")
-        
         return result
     except Exception as e:
         print(f"Error loading merchant data: {e}")
@@ -90,21 +122,58 @@ def load_merchants() -> Dict[str, Tuple[str, str]]:
 
 def load_transaction_indicators() -> Set[str]:
     """Load transaction indicator keywords from CSV"""
-    result = set()
     try:
-        with open(TRANSACTION_INDICATORS_CSV, 'r') as f:
-            for line in f:
-                keyword = line.strip()
-                if keyword:  # Skip empty lines
-                    result.add(keyword.lower())
+        with open(TRANSACTION_INDICATORS_CSV, 'r', encoding='utf-8') as f:
+            # Read in one go and split in C; blank lines are skipped
+            result = {line.strip().lower() for line in f.read().splitlines() if line.strip()}
         print(f"Loaded {len(result)} transaction indicators from {TRANSACTION_INDICATORS_CSV}")
         return result
     except Exception as e:
         print(f"Error loading transaction indicators: {e}")
         return set()
 
-def analyze_sms(sms_text, sender=None):
+def analyze_sms(sms_text: str, sender: Optional[str] = None) -> SMSResult:
     """Simple SMS analyzer for testing the CSV data integration"""
+    result, is_scam = _collect_indicators(sms_text, sender)
+    
+    # Set risk level from a single integer score: fraud indicators give the
+    # base level (scam patterns are always high), two or more language issues
+    # bump it by one and sensitive information requests force it to high
+    score = max(min(len(result.fraud_indicators), 2), 2 * is_scam)
+    score += (len(result.language_issues) >= 2) + 2 * (len(result.sensitive_info_requests) > 0)
+    result.risk_level = _RISK_LEVELS[min(score, 2)]
+    
+    return result
+
+def analyze_sms_batch(messages: Iterable[Tuple[str, Optional[str]]]) -> List[SMSResult]:
+    """Analyze (sms_text, sender) pairs, scoring all risk levels in one NumPy pass"""
+    if np is None:
+        return [analyze_sms(sms_text, sender) for sms_text, sender in messages]
+    
+    collected = [_collect_indicators(sms_text, sender) for sms_text, sender in messages]
+    if not collected:
+        return []
+    
+    # Counts and scores are native ints (intp): a narrower dtype would wrap
+    # once a message matched more indicators than it can hold
+    n_fraud = np.fromiter((len(r.fraud_indicators) for r, _ in collected), dtype=np.intp, count=len(collected))
+    is_scam = np.fromiter((scam for _, scam in collected), dtype=np.intp, count=len(collected))
+    n_lang = np.fromiter((len(r.language_issues) for r, _ in collected), dtype=np.intp, count=len(collected))
+    n_sens = np.fromiter((len(r.sensitive_info_requests) for r, _ in collected), dtype=np.intp, count=len(collected))
+    
+    # Same score as analyze_sms, evaluated over the whole batch
+    score = np.maximum(np.minimum(n_fraud, 2), 2 * is_scam)
+    score += (n_lang >= 2).astype(np.intp) + 2 * (n_sens > 0).astype(np.intp)
+    levels = np.array(_RISK_LEVELS)[np.minimum(score, 2)]
+    
+    results = []
+    for (result, _), level in zip(collected, levels.tolist()):
+        result.risk_level = level
+        results.append(result)
+    return results
+
+def _collect_indicators(sms_text: str, sender: Optional[str]) -> Tuple[SMSResult, bool]:
+    """Run all checks on an SMS; returns the result (risk level unset) and the scam flag"""
     # Load the data from CSV files
     global banks, fraud_keywords, merchants, transaction_indicators
     
@@ -117,36 +186,26 @@ def analyze_sms(sms_text, sender=None):
     if not transaction_indicators:
         transaction_indicators = load_transaction_indicators()
     
-    # Analyze the SMS
-    result = {
-        "raw_sms": sms_text,
-        "sender": sender,
-        "is_valid_sender": False,
-        "merchant": None,
-        "category": None,
-        "transaction_indicators": [],
-        "fraud_indicators": [],
-        "language_issues": [],
-        "sensitive_info_requests": [],
-        "risk_level": "low"
-    }
+    # Analyze the SMS; the lowercased text is shared with the helper checks
+    result = SMSResult(sms_text, sender)
+    text_lower = sms_text.lower()
     
     # Check sender
     if sender:
         for bank, sender_id in banks.items():
             if sender == sender_id:
-                result["is_valid_sender"] = True
+                result.is_valid_sender = True
                 break
     
     # Check for merchants
     for abbr, (name, category) in merchants.items():
-        if name.lower() in sms_text.lower():
-            result["merchant"] = name
-            result["category"] = category
+        if name.lower() in text_lower:
+            result.merchant = name
+            result.category = category
             break
     
     # Common merchants that might not be in our list
-    if not result["merchant"]:
+    if not result.merchant:
         common_merchants = {
             "swiggy": ("Swiggy", "Food Delivery"),
             "zomato": ("Zomato", "Food Delivery"),
@@ -154,72 +213,63 @@ def analyze_sms(sms_text, sender=None):
             "flipkart": ("Flipkart", "Shopping"),
         }
         for key, (name, category) in common_merchants.items():
-            if key in sms_text.lower():
-                result["merchant"] = name
-                result["category"] = category
+            if key in text_lower:
+                result.merchant = name
+                result.category = category
                 break
     
     # Check for transaction indicators
-    for indicator in transaction_indicators:
-        if indicator in sms_text.lower():
-            result["transaction_indicators"].append(indicator)
+    found_indicators = [indicator for indicator in transaction_indicators if indicator in text_lower]
+    if found_indicators:
+        result.transaction_indicators = tuple(found_indicators)
     
     # Check for fraud indicators
-    for keyword in fraud_keywords:
-        if keyword in sms_text.lower():
-            result["fraud_indicators"].append(keyword)
+    found_fraud = [keyword for keyword in fraud_keywords if keyword in text_lower]
     
     # Check for common fraud patterns
     url_pattern = r'(?:http[s]?://|bit\.ly/|goo\.gl/|tinyurl\.com/|t\.co/)'
-    if re.search(url_pattern, sms_text.lower()):
-        result["fraud_indicators"].append("contains_url")
+    if re.search(url_pattern, text_lower):
+        found_fraud.append("contains_url")
+    
+    is_kyc_scam = "kyc" in text_lower and ("update" in text_lower or "verify" in text_lower)
+    if is_kyc_scam:
+        found_fraud.append("kyc_scam")
     
-    if "kyc" in sms_text.lower() and ("update" in sms_text.lower() or "verify" in sms_text.lower()):
-        result["fraud_indicators"].append("kyc_scam")
+    is_prize_scam = ("prize" in text_lower or "won" in text_lower) and ("claim" in text_lower or "collect" in text_lower)
+    if is_prize_scam:
+        found_fraud.append("prize_scam")
     
-    if ("prize" in sms_text.lower() or "won" in sms_text.lower()) and ("claim" in sms_text.lower() or "collect" in sms_text.lower()):
-        result["fraud_indicators"].append("prize_scam")
+    if found_fraud:
+        result.fraud_indicators = tuple(found_fraud)
     
     # NEW: Check for language issues
-    check_language_issues(sms_text, result)
+    language_issues = check_language_issues(sms_text, text_lower)
+    if language_issues:
+        result.language_issues = tuple(language_issues)
     
     # NEW: Check for sensitive information requests
-    check_sensitive_info_requests(sms_text, result)
-    
-    # Set risk level
-    if len(result["fraud_indicators"]) >= 2 or "kyc_scam" in result["fraud_indicators"] or "prize_scam" in result["fraud_indicators"]:
-        result["risk_level"] = "high"
-    elif len(result["fraud_indicators"]) >= 1:
-        result["risk_level"] = "medium"
-    
-    # Elevate risk based on language issues
-    if len(result["language_issues"]) >= 2 and result["risk_level"] == "low":
-        result["risk_level"] = "medium"
-    elif len(result["language_issues"]) >= 2 and result["risk_level"] == "medium":
-        result["risk_level"] = "high"
-    
-    # Elevate risk based on sensitive information requests (highest priority)
-    if len(result["sensitive_info_requests"]) > 0:
-        result["risk_level"] = "high"
+    sensitive_info_requests = check_sensitive_info_requests(text_lower)
+    if sensitive_info_requests:
+        result.sensitive_info_requests = tuple(sensitive_info_requests)
     
-    return result
+    return result, is_kyc_scam or is_prize_scam
 
-def check_language_issues(sms_text, result):
-    """Check for suspicious language patterns"""
-    text_lower = sms_text.lower()
+def check_language_issues(sms_text: str, text_lower: str) -> List[str]:
+    """Check for suspicious language patterns; text_lower is sms_text.lower()"""
+    issues: List[str] = []
     
     # Check for excessive capitalization (more than 5 consecutive capital letters)
-    if re.search(r'[A-Z]{5,}', sms_text):
-        result["language_issues"].append("excessive_caps")
+    if CAPS_RUN_PATTERN.search(sms_text):
+        issues.append("excessive_caps")
     
     # Check for excessive punctuation
-    if re.search(r'[!?]{2,}', sms_text):
-        result["language_issues"].append("excessive_punctuation")
+    if PUNCT_RUN_PATTERN.search(sms_text):
+        issues.append("excessive_punctuation")
     
     # Check for aggressive/threatening language
     for term in AGGRESSIVE_TERMS:
         if term.lower() in text_lower:
-            result["language_issues"].append("aggressive_language")
+            issues.append("aggressive_language")
             break
     
     # Check for poor grammar/spelling issues (common examples)
@@ -237,12 +287,14 @@ def check_language_issues(sms_text, result):
         if re.search(pattern, text_lower):
             if correct_pattern and re.search(correct_pattern, text_lower):
                 continue  # Skip if the correct pattern is found
-            result["language_issues"].append("grammar_issues")
+            issues.append("grammar_issues")
             break
+    
+    return issues
 
-def check_sensitive_info_requests(sms_text, result):
-    """Check for requests for sensitive information"""
-    text_lower = sms_text.lower()
+def check_sensitive_info_requests(text_lower: str) -> List[str]:
+    """Check a lowercased SMS for requests for sensitive information"""
+    info_requests: List[str] = []
     
     # Look for sensitive information terms
     for term in SENSITIVE_INFO_TERMS:
@@ -255,7 +307,7 @@ def check_sensitive_info_requests(sms_text, result):
             
             for pattern in request_patterns:
                 if re.search(pattern, text_lower):
-                    result["sensitive_info_requests"].append(term)
+                    info_requests.append(term)
                     break
     
     # Check for common phishing phrases
@@ -268,10 +320,12 @@ def check_sensitive_info_requests(sms_text, result):
     
     for phrase in phishing_phrases:
         if re.search(phrase, text_lower):
-            result["sensitive_info_requests"].append("phishing_phrase")
+            info_requests.append("phishing_phrase")
             break
+    
+    return info_requests
 
-def run_test_cases():
+def run_test_cases() -> None:
     """Run test cases to demonstrate CSV integration"""
     test_cases = [
         {
@@ -307,23 +361,43 @@ def run_test_cases():
     ]
     
     for test_case in test_cases:
-        print(f"\nAnalyzing: {test_case['name']}")
-        print(f"SMS: {test_case['sms']}")
-        print(f"Sender: {test_case['sender']}")
-        
         result = analyze_sms(test_case['sms'], test_case['sender'])
         
-        print("\nResults:")
-        print(f"  Merchant: {result['merchant']}")
-        print(f"  Category: {result['category']}")
-        print(f"  Transaction Indicators: {', '.join(result['transaction_indicators']) if result['transaction_indicators'] else 'None'}")
-        print(f"  Fraud Indicators: {', '.join(result['fraud_indicators']) if result['fraud_indicators'] else 'None'}")
-        print(f"  Language Issues: {', '.join(result['language_issues']) if result['language_issues'] else 'None'}")
-        print(f"  Sensitive Info Requests: {', '.join(result['sensitive_info_requests']) if result['sensitive_info_requests'] else 'None'}")
-        print(f"  Risk Level: {result['risk_level']}")
-        print("-" * 50)
+        # Build each case's report and emit it with a single write
+        sys.stdout.write("\n".join([
+            f"\nAnalyzing: {test_case['name']}",
+            f"SMS: {test_case['sms']}",
+            f"Sender: {test_case['sender']}",
+            "\nResults:",
+            f"  Merchant: {result.merchant}",
+            f"  Category: {result.category}",
+            f"  Transaction Indicators: {', '.join(result.transaction_indicators) if result.transaction_indicators else 'None'}",
+            f"  Fraud Indicators: {', '.join(result.fraud_indicators) if result.fraud_indicators else 'None'}",
+            f"  Language Issues: {', '.join(result.language_issues) if result.language_issues else 'None'}",
+            f"  Sensitive Info Requests: {', '.join(result.sensitive_info_requests) if result.sensitive_info_requests else 'None'}",
+            f"  Risk Level: {result.risk_level}",
+            "-" * 50,
+            "",
+        ]))
+
+def format_analysis(result: SMSResult) -> str:
+    """Format an analysis result as the multi-line report shown to the user"""
+    return "\n".join([
+        "\nAnalysis Results:",
+        f"  SMS: {result.raw_sms}",
+        f"  Sender: {result.sender if result.sender else 'Not provided'}",
+        f"  Valid Sender: {'Yes' if result.is_valid_sender else 'No'}",
+        f"  Merchant: {result.merchant if result.merchant else 'Not detected'}",
+        f"  Category: {result.category if result.category else 'Not detected'}",
+        f"  Transaction Indicators: {', '.join(result.transaction_indicators) if result.transaction_indicators else 'None'}",
+        f"  Fraud Indicators: {', '.join(result.fraud_indicators) if result.fraud_indicators else 'None'}",
+        f"  Language Issues: {', '.join(result.language_issues) if result.language_issues else 'None'}",
+        f"  Sensitive Info Requests: {', '.join(result.sensitive_info_requests) if result.sensitive_info_requests else 'None'}",
+        f"  Risk Level: {result.risk_level.upper()}",
+        "",
+    ])
 
-def interactive_mode():
+def interactive_mode() -> None:
     """Run in interactive mode to test SMS messages from user input"""
     print("\n" + "=" * 50)
     print("SMS Analyzer Interactive Mode")
@@ -346,25 +420,13 @@ def interactive_mode():
             break
         
         sender = input("Enter sender ID (optional, press Enter to skip): ")
-        if not sender:
-            sender = None
         
         print("\nAnalyzing SMS...")
-        result = analyze_sms(sms_text, sender)
+        result = analyze_sms(sms_text, sender or None)
         
-        print("\nAnalysis Results:")
-        print(f"  SMS: {result['raw_sms']}")
-        print(f"  Sender: {result['sender'] if result['sender'] else 'Not provided'}")
-        print(f"  Valid Sender: {'Yes' if result['is_valid_sender'] else 'No'}")
-        print(f"  Merchant: {result['merchant'] if result['merchant'] else 'Not detected'}")
-        print(f"  Category: {result['category'] if result['category'] else 'Not detected'}")
-        print(f"  Transaction Indicators: {', '.join(result['transaction_indicators']) if result['transaction_indicators'] else 'None'}")
-        print(f"  Fraud Indicators: {', '.join(result['fraud_indicators']) if result['fraud_indicators'] else 'None'}")
-        print(f"  Language Issues: {', '.join(result['language_issues']) if result['language_issues'] else 'None'}")
-        print(f"  Sensitive Info Requests: {', '.join(result['sensitive_info_requests']) if result['sensitive_info_requests'] else 'None'}")
-        print(f"  Risk Level: {result['risk_level'].upper()}")
+        sys.stdout.write(format_analysis(result))
 
-def main():
+def main() -> None:
     """Main function to handle command line arguments"""
     parser = argparse.ArgumentParser(description='SMS Analyzer for Fraud Detection')
     parser.add_argument('--examples', action='store_true', help='Run example test cases')
@@ -377,17 +439,7 @@ def main():
         run_test_cases()
     elif args.sms:
         result = analyze_sms(args.sms, args.sender)
-        print("\nAnalysis Results:")
-        print(f"  SMS: {result['raw_sms']}")
-        print(f"  Sender: {result['sender'] if result['sender'] else 'Not provided'}")
-        print(f"  Valid Sender: {'Yes' if result['is_valid_sender'] else 'No'}")
-        print(f"  Merchant: {result['merchant'] if result['merchant'] else 'Not detected'}")
-        print(f"  Category: {result['category'] if result['category'] else 'Not detected'}")
-        print(f"  Transaction Indicators: {', '.join(result['transaction_indicators']) if result['transaction_indicators'] else 'None'}")
-        print(f"  Fraud Indicators: {', '.join(result['fraud_indicators']) if result['fraud_indicators'] else 'None'}")
-        print(f"  Language Issues: {', '.join(result['language_issues']) if result['language_issues'] else 'None'}")
-        print(f"  Sensitive Info Requests: {', '.join(result['sensitive_info_requests']) if result['sensitive_info_requests'] else 'None'}")
-        print(f"  Risk Level: {result['risk_level'].upper()}")
+        sys.stdout.write(format_analysis(result))
     else:
         interactive_mode()
 
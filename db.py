@@ -1,159 +1,473 @@
+import re
 import sqlite3
 import json
-from typing import Dict, Any, List, Optional
+import logging
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import os
+import atexit
+import copy
 import datetime
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+
+logger = logging.getLogger("db")
 
 # Database file path
 DB_FILE = "transactions.db"
 
+# Connection tuning: WAL lets readers run alongside the writer and, with
+# synchronous=NORMAL, avoids an fsync on every commit. The journal mode is
+# stored in the database file, so it only needs setting once per file
+JOURNAL_MODE_PRAGMA = "PRAGMA journal_mode = WAL"
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA foreign_keys = 1",
+)
+
+# Each thread keeps one long-lived connection; bumping the generation makes
+# every thread reconnect (e.g. after init_db recreates the database file)
+_local = threading.local()
+_connections: List[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+_generation = 0
+_journal_mode_set = False
+
+# INSERT ... RETURNING needs SQLite 3.35+; older libraries fall back to lastrowid
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Balance mentions like "Available balance: Rs.45000" or "Updated balance: Rs.35000";
+# the available/updated/closing prefixes are optional so one pattern covers them all
+BALANCE_PATTERN = re.compile(
+    r"(?:(?:[Aa]vailable|[Uu]pdated|[Cc]losing)\s+)?[Bb]alance\s*(?:is|:)?\s*(?:Rs\.?|INR|₹)\s*([0-9,]+(?:\.[0-9]+)?)"
+)
+
+# Insert or adjust an account balance in one statement, stamped with SQLite's
+# local time. Parameters: user, account, value for a new account, whether to
+# overwrite an existing balance, and the delta to add to an existing one otherwise
+UPSERT_BALANCE_SQL = '''
+INSERT INTO balances (user_id, account_masked, current_balance, last_updated)
+VALUES (?, ?, ?, datetime('now', 'localtime'))
+ON CONFLICT(user_id, account_masked) DO UPDATE SET
+    current_balance = CASE WHEN ? THEN excluded.current_balance
+                           ELSE balances.current_balance + ? END,
+    last_updated = excluded.last_updated
+'''
+
+# Parameters: merchant, amount, account, last paid date, next due date
+UPSERT_SUBSCRIPTION_SQL = '''
+INSERT INTO subscriptions (merchant, amount, account_masked, last_paid, next_due)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(user_id, merchant, account_masked) DO UPDATE SET
+    amount = excluded.amount,
+    last_paid = excluded.last_paid,
+    next_due = excluded.next_due
+'''
+
+INSERT_TRANSACTION_SQL = '''
+INSERT INTO transactions 
+(user_id, sms_text, amount, transaction_type, merchant_name, category, account_masked, date, confidence_score, is_subscription)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_REMINDER_SQL = '''
+INSERT INTO reminders 
+(user_id, reminder_type, merchant, amount, account_masked, due_date)
+VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Gaps in days between the 3 most recent matching transactions, summarised
+# in-engine: number of non-zero gaps, their mean and their spread
+RECURRING_INTERVALS_SQL = '''
+SELECT COUNT(gap) AS intervals, AVG(gap) AS avg_interval, MAX(gap) - MIN(gap) AS variation
+FROM (
+    SELECT ABS(julianday(date) - LAG(julianday(date)) OVER (ORDER BY date DESC)) AS gap
+    FROM (
+        SELECT date FROM transactions
+        WHERE user_id = ? AND merchant_name = ? AND 
+              ABS(amount - ?) <= ? AND
+              account_masked = ?
+        ORDER BY date DESC
+        LIMIT 3
+    )
+    WHERE date(date) IS NOT NULL
+)
+WHERE gap > 0
+'''
+
+INSERT_GOAL_SQL = '''
+INSERT INTO user_goals 
+(user_id, goal_type, target_amount, target_date, status, current_amount)
+VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Static text for both get_user_goals variants so each hits the statement cache
+# (idx_goals_user_created / idx_goals_user_status serve their filter and sort
+# order). Days remaining depend on the clock, so unlike progress they can't be stored
+USER_GOALS_SQL = '''
+SELECT id, goal_type, target_amount, current_amount, target_date, status, created_at, progress,
+       CASE WHEN target_date <> '' THEN
+           MAX(0, CAST(julianday(target_date) - julianday('now', 'localtime') AS INTEGER))
+       END as days_remaining
+FROM user_goals
+WHERE user_id = ?
+ORDER BY created_at DESC
+'''
+
+ACTIVE_USER_GOALS_SQL = '''
+SELECT id, goal_type, target_amount, current_amount, target_date, status, created_at, progress,
+       CASE WHEN target_date <> '' THEN
+           MAX(0, CAST(julianday(target_date) - julianday('now', 'localtime') AS INTEGER))
+       END as days_remaining
+FROM user_goals
+WHERE user_id = ? AND status = 'active'
+ORDER BY created_at DESC
+'''
+
+# Columns added after a table was first released: (table, column, definition).
+# init_db adds any that an existing database is missing
+ADDED_COLUMNS = (
+    ("transactions", "user_id", "INTEGER DEFAULT 1"),
+    ("user_goals", "progress", "REAL GENERATED ALWAYS AS ("
+     "CASE WHEN target_amount > 0 THEN current_amount * 100.0 / target_amount ELSE 0 END) VIRTUAL"),
+)
+
+# Full schema, run as one script by init_db(); every statement is idempotent
+SCHEMA_SQL = '''
+-- Transactions
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER DEFAULT 1,
+    sms_text TEXT NOT NULL,
+    amount REAL NOT NULL,
+    transaction_type TEXT NOT NULL,
+    merchant_name TEXT,
+    category TEXT NOT NULL DEFAULT 'Uncategorized',
+    account_masked TEXT,
+    date TEXT,
+    confidence_score REAL DEFAULT 1.0,
+    is_subscription INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Archetypes
+CREATE TABLE IF NOT EXISTS archetypes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER DEFAULT 1,
+    archetype TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Recommendations click log
+CREATE TABLE IF NOT EXISTS recommendation_clicks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_name TEXT NOT NULL,
+    user_id INTEGER DEFAULT 1,
+    clicked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Balances
+CREATE TABLE IF NOT EXISTS balances (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER DEFAULT 1,
+    account_masked TEXT NOT NULL,
+    current_balance REAL DEFAULT 0.0,
+    last_updated TEXT,
+    UNIQUE(user_id, account_masked)
+);
+
+-- Subscriptions
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER DEFAULT 1,
+    merchant TEXT NOT NULL,
+    amount REAL,
+    account_masked TEXT,
+    last_paid TEXT,
+    next_due TEXT,
+    is_recurring INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, merchant, account_masked)
+);
+
+-- Known subscription merchants
+CREATE TABLE IF NOT EXISTS subscription_merchants (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    merchant_name TEXT NOT NULL UNIQUE
+);
+
+-- Financial goals
+CREATE TABLE IF NOT EXISTS user_goals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER DEFAULT 1,
+    goal_type TEXT NOT NULL,
+    target_amount REAL NOT NULL,
+    current_amount REAL DEFAULT 0.0,
+    target_date TEXT,
+    status TEXT DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    progress REAL GENERATED ALWAYS AS (
+        CASE WHEN target_amount > 0 THEN current_amount * 100.0 / target_amount ELSE 0 END
+    ) VIRTUAL
+);
+
+-- Reminders for recurring expenses
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER DEFAULT 1,
+    reminder_type TEXT NOT NULL,
+    merchant TEXT NOT NULL,
+    amount REAL NOT NULL,
+    account_masked TEXT,
+    due_date TEXT NOT NULL,
+    is_paid INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Indexes for the hot lookups: recurring-transaction detection,
+-- aggregates filtered by type/date (amount is included so spending and income
+-- totals are index-only), per-category debit totals, subscriptions by due
+-- date, goals by user (active or all) and upcoming reminders.
+-- balances is already covered by its UNIQUE(user_id, account_masked) index.
+CREATE INDEX IF NOT EXISTS idx_tx_recurring
+ON transactions (user_id, merchant_name, account_masked, date DESC);
+CREATE INDEX IF NOT EXISTS idx_tx_type_date_amt
+ON transactions (transaction_type, date, amount);
+CREATE INDEX IF NOT EXISTS idx_tx_type_cat_amt
+ON transactions (transaction_type, category, amount);
+CREATE INDEX IF NOT EXISTS idx_tx_sub
+ON transactions (is_subscription, transaction_type);
+CREATE INDEX IF NOT EXISTS idx_rem_user_due
+ON reminders (user_id, is_paid, due_date);
+CREATE INDEX IF NOT EXISTS idx_subs_due
+ON subscriptions (next_due);
+CREATE INDEX IF NOT EXISTS idx_goals_user_status
+ON user_goals (user_id, status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_goals_user_created
+ON user_goals (user_id, created_at DESC);
+'''
+
+# Lowercased subscription_merchants names, loaded on first use
+_subscription_merchants: Optional[Tuple[str, ...]] = None
+
+# Dashboard analytics change on human timescales: a result is reused for up to
+# ANALYTICS_TTL_SECONDS, or until this module writes to one of its source tables
+ANALYTICS_TTL_SECONDS = 30
+_analytics_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+_analytics_lock = threading.Lock()
+_analytics_refresher: Optional[threading.Thread] = None
+
+# Dashboard reads memoized per thread and (function, arguments). An entry is
+# stamped with the thread's connection, _read_version (bumped by this process's
+# writes) and PRAGMA data_version (which changes when any other connection,
+# including another process, commits); it is reused only while the stamp holds
+_read_version = 0
+_read_version_lock = threading.Lock()
+
+def _cached_until_write(func):
+    """Memoize a read-only query until the database changes; callers get their own copy"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = get_db_connection()
+        # Inside a transaction the connection sees its own uncommitted writes,
+        # which PRAGMA data_version does not track and a rollback can undo
+        if conn.in_transaction:
+            return func(*args, **kwargs)
+        
+        # Taken before the query, so a write that races it invalidates the entry
+        stamp = (conn, _read_version, conn.execute("PRAGMA data_version").fetchone()[0])
+        cache = getattr(_local, "read_cache", None)
+        if cache is None:
+            cache = _local.read_cache = {}
+        
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        entry = cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            return copy.deepcopy(entry[1])
+        
+        result = func(*args, **kwargs)
+        # Empty results are not kept: the queries also return them on error
+        if result:
+            cache[key] = (stamp, copy.deepcopy(result))
+        return result
+    return wrapper
+
 def get_db_connection():
-    """Get a connection to the SQLite database"""
-    conn = sqlite3.connect(DB_FILE)
-    # Enable foreign keys
-    conn.execute("PRAGMA foreign_keys = 1")
+    """
+    Get the current thread's connection to the SQLite database
+    
+    The connection is opened on first use and reused by later calls in the
+    same thread, so callers must not close it.
+    """
+    global _journal_mode_set
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.generation == _generation:
+        return conn
+    
+    # Autocommit mode: single statements commit on their own and multi-statement
+    # writes use an explicit BEGIN/COMMIT via _transaction()
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, isolation_level=None, cached_statements=256)
+    if not _journal_mode_set:
+        conn.execute(JOURNAL_MODE_PRAGMA)
+        _journal_mode_set = True
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     # Return dictionary for rows
     conn.row_factory = sqlite3.Row
+    
+    _local.conn = conn
+    _local.generation = _generation
+    with _connections_lock:
+        _connections.append(conn)
     return conn
 
+@lru_cache(maxsize=None)
+def _returning_id_sql(sql: str) -> str:
+    """INSERT text with RETURNING id appended, built once per statement"""
+    return f"{sql.rstrip()} RETURNING id"
+
+def _insert_returning_id(conn: sqlite3.Connection, sql: str, params: Tuple[Any, ...]) -> int:
+    """Run an INSERT statement and return the id of the new row"""
+    if HAS_RETURNING:
+        return conn.execute(_returning_id_sql(sql), params).fetchone()[0]
+    return conn.execute(sql, params).lastrowid
+
+@atexit.register
+def close_db_connections():
+    """Close every cached connection; threads reconnect on their next call"""
+    global _generation
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                # Refresh the planner statistics (sqlite_stat1) SQLite finds
+                # missing or stale for tables this connection queried
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            conn.close()
+        _connections.clear()
+        _generation += 1
+
+def _roll_back(conn: sqlite3.Connection, *statements: str):
+    """Undo a failed block; errors here are logged so they don't replace the original exception"""
+    try:
+        for statement in statements:
+            conn.execute(statement)
+    except sqlite3.Error as e:
+        logger.error(f"Error rolling back transaction: {e}")
+
+@contextmanager
+def _transaction(conn: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Connection]:
+    """
+    Run a block of writes in one transaction on the given (or thread's) connection
+    
+    If the connection is already inside a transaction the block runs in a
+    savepoint of it: its writes are undone on error (even if the caller
+    catches the exception) and otherwise committed by the outermost block.
+    A top-level block is committed on success and rolled back on error.
+    """
+    conn = conn or get_db_connection()
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT nested_write")
+        try:
+            yield conn
+            conn.execute("RELEASE nested_write")
+        except BaseException:
+            _roll_back(conn, "ROLLBACK TO nested_write", "RELEASE nested_write")
+            raise
+        return
+    
+    # IMMEDIATE takes the write lock up front, so a transaction never has to
+    # upgrade from a read lock (and fail with SQLITE_BUSY) halfway through
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        # A failed COMMIT (busy, disk full, deferred constraint) leaves the
+        # transaction open, so always roll back
+        _roll_back(conn, "ROLLBACK")
+        raise
+
+@contextmanager
+def write_transaction() -> Iterator[sqlite3.Connection]:
+    """
+    Group several db writes made by this thread into a single transaction
+    
+    The helpers called inside the block (set_user_goal, update_goal_progress,
+    insert_transaction, ...) join it instead of committing on their own, so
+    the whole batch pays for one commit. Cached counts and analytics are
+    dropped once it ends, whether it committed or rolled back.
+    
+    Example:
+        with db.write_transaction():
+            for goal in goals:
+                db.set_user_goal(goal)
+    """
+    try:
+        with _transaction() as conn:
+            yield conn
+    finally:
+        invalidate_transaction_count()
+        invalidate_analytics_cache()
+
+def reset_db():
+    """Delete the database file (and any WAL leftovers) and recreate an empty schema"""
+    global _subscription_merchants, _journal_mode_set
+    _subscription_merchants = None
+    invalidate_transaction_count()
+    invalidate_analytics_cache()
+    
+    close_db_connections()
+    for path in (DB_FILE, DB_FILE + "-wal", DB_FILE + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    # The recreated file starts out in the default rollback-journal mode
+    _journal_mode_set = False
+    
+    init_db()
+
 def init_db():
     """Initialize the database with necessary tables if they don't exist"""
-    # First, remove the existing database file if it exists
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
-        
     conn = get_db_connection()
     try:
-        # Create transactions table
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sms_text TEXT NOT NULL,
-            amount REAL NOT NULL,
-            transaction_type TEXT NOT NULL,
-            merchant_name TEXT,
-            category TEXT NOT NULL DEFAULT 'Uncategorized',
-            account_masked TEXT,
-            date TEXT,
-            confidence_score REAL DEFAULT 1.0,
-            is_subscription INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Create archetypes table
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS archetypes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER DEFAULT 1,
-            archetype TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Create recommendations click log table
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS recommendation_clicks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_name TEXT NOT NULL,
-            user_id INTEGER DEFAULT 1,
-            clicked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Create balances table
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS balances (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER DEFAULT 1,
-            account_masked TEXT NOT NULL,
-            current_balance REAL DEFAULT 0.0,
-            last_updated TEXT,
-            UNIQUE(user_id, account_masked)
-        )
-        ''')
+        # Bring older databases up to date first, since the schema script
+        # indexes some of the added columns (table_xinfo also lists generated ones)
+        for table, column, definition in ADDED_COLUMNS:
+            columns = {row['name'] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+            if columns and column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
         
-        # Create subscriptions table
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS subscriptions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER DEFAULT 1,
-            merchant TEXT NOT NULL,
-            amount REAL,
-            account_masked TEXT,
-            last_paid TEXT,
-            next_due TEXT,
-            is_recurring INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(user_id, merchant, account_masked)
-        )
-        ''')
-        
-        # Create known subscription merchants table
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS subscription_merchants (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            merchant_name TEXT NOT NULL UNIQUE
-        )
-        ''')
-        
-        # Create user_goals table for storing financial goals
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS user_goals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER DEFAULT 1,
-            goal_type TEXT NOT NULL,
-            target_amount REAL NOT NULL,
-            current_amount REAL DEFAULT 0.0,
-            target_date TEXT,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Create reminders table for recurring expenses
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER DEFAULT 1,
-            reminder_type TEXT NOT NULL,
-            merchant TEXT NOT NULL,
-            amount REAL NOT NULL,
-            account_masked TEXT,
-            due_date TEXT NOT NULL,
-            is_paid INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
+        conn.executescript(SCHEMA_SQL)
         
         # Insert some known subscription merchants if the table is empty
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM subscription_merchants")
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            known_merchants = [
-                "Netflix", "Hotstar", "Amazon Prime", "Spotify", "YouTube Premium", 
-                "PhonePe Recharge", "Airtel Recharge", "Jio Recharge", "Tata Play", 
-                "Zee5", "SonyLIV", "Apple Music", "iCloud+", "Google One", 
-                "Microsoft 365", "Adobe Creative Cloud", "Disney+", "Audible",
-                "LinkedIn Premium", "Coursera", "Udemy", "Gym Membership"
-            ]
+        with _transaction(conn):
+            has_merchants = conn.execute("SELECT EXISTS(SELECT 1 FROM subscription_merchants)").fetchone()[0]
             
-            for merchant in known_merchants:
-                conn.execute(
+            if not has_merchants:
+                known_merchants = [
+                    "Netflix", "Hotstar", "Amazon Prime", "Spotify", "YouTube Premium", 
+                    "PhonePe Recharge", "Airtel Recharge", "Jio Recharge", "Tata Play", 
+                    "Zee5", "SonyLIV", "Apple Music", "iCloud+", "Google One", 
+                    "Microsoft 365", "Adobe Creative Cloud", "Disney+", "Audible",
+                    "LinkedIn Premium", "Coursera", "Udemy", "Gym Membership"
+                ]
+                
+                conn.executemany(
                     "INSERT INTO subscription_merchants (merchant_name) VALUES (?)",
-                    (merchant,)
+                    [(merchant,) for merchant in known_merchants]
                 )
         
-        conn.commit()
-        print("Database initialized successfully")
+        logger.info("Database initialized successfully")
     except Exception as e:
-        print(f"Error initializing database: {e}")
-    finally:
-        conn.close()
+        logger.error(f"Error initializing database: {e}")
 
 def insert_transaction(transaction: Dict[str, Any], sms_text: str) -> int:
     """
@@ -171,58 +485,149 @@ def insert_transaction(transaction: Dict[str, Any], sms_text: str) -> int:
         # Check if this is a subscription transaction
         is_subscription = check_if_subscription(transaction.get('merchant_name', ''))
         
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT INTO transactions 
-        (sms_text, amount, transaction_type, merchant_name, category, account_masked, date, confidence_score, is_subscription)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            sms_text,
-            transaction.get('amount', 0),
-            transaction.get('transaction_type', 'unknown'),
-            transaction.get('merchant_name', ''),
-            transaction.get('category', 'Uncategorized'),
-            transaction.get('account_masked', ''),
-            transaction.get('date', ''),
-            transaction.get('confidence_score', 1.0),
-            1 if is_subscription else 0
-        ))
-        transaction_id = cursor.lastrowid
-        conn.commit()
-        
-        # Update balance
-        update_balance(
-            transaction.get('account_masked', ''),
-            transaction.get('amount', 0),
-            transaction.get('transaction_type', ''),
-            extract_balance_from_sms(sms_text)
-        )
-        
-        # If it's a subscription, add/update subscription record
-        if is_subscription:
-            save_subscription(
+        # The insert and its balance/subscription/reminder follow-ups are
+        # committed together (or rolled back together on error)
+        with _transaction(conn):
+            transaction_id = _insert_returning_id(conn, INSERT_TRANSACTION_SQL, (
+                transaction.get('user_id', 1),
+                sms_text,
+                transaction.get('amount', 0),
+                transaction.get('transaction_type', 'unknown'),
+                transaction.get('merchant_name', ''),
+                transaction.get('category', 'Uncategorized'),
+                transaction.get('account_masked', ''),
+                transaction.get('date', ''),
+                transaction.get('confidence_score', 1.0),
+                1 if is_subscription else 0
+            ))
+            
+            # Update balance
+            update_balance(
+                transaction.get('account_masked', ''),
+                transaction.get('amount', 0),
+                transaction.get('transaction_type', ''),
+                extract_balance_from_sms(sms_text),
+                conn=conn,
+                user_id=transaction.get('user_id', 1)
+            )
+            
+            # If it's a subscription, add/update subscription record
+            if is_subscription:
+                save_subscription(
+                    transaction.get('merchant_name', ''),
+                    transaction.get('amount', 0),
+                    transaction.get('account_masked', ''),
+                    transaction.get('date', ''),
+                    conn=conn
+                )
+            
+            # Check for recurring transactions
+            detect_recurring_transactions(
                 transaction.get('merchant_name', ''),
                 transaction.get('amount', 0),
                 transaction.get('account_masked', ''),
-                transaction.get('date', '')
+                transaction.get('date', ''),
+                transaction.get('user_id', 1),
+                conn=conn
             )
         
-        # Check for recurring transactions
-        detect_recurring_transactions(
-            transaction.get('merchant_name', ''),
-            transaction.get('amount', 0),
-            transaction.get('account_masked', ''),
-            transaction.get('date', ''),
-            transaction.get('user_id', 1)
-        )
-        
+        invalidate_transaction_count()
+        invalidate_analytics_cache()
         return transaction_id
     except Exception as e:
-        print(f"Error inserting transaction: {e}")
-        conn.rollback()
+        logger.error(f"Error inserting transaction: {e}")
         return -1
-    finally:
-        conn.close()
+
+def insert_transactions(batch: List[Tuple[Dict[str, Any], str]]) -> List[int]:
+    """
+    Insert many transactions in a single database transaction
+    
+    Each row is inserted with RETURNING id (its prepared statement is reused
+    from the connection cache), balance changes are folded into a single
+    upsert per account, and recurring detection runs once per distinct
+    merchant/account/amount after the whole batch is stored.
+    
+    Args:
+        batch: List of (transaction dictionary, original SMS text) pairs
+        
+    Returns:
+        The IDs of the inserted transactions, in batch order (empty on error)
+    """
+    if not batch:
+        return []
+        
+    conn = get_db_connection()
+    try:
+        rows = []
+        subscriptions = []
+        recurring = {}
+        # (user, account) -> [value if the account is new, delta if it exists, explicit balance seen]
+        balances: Dict[Tuple[int, str], List[Any]] = {}
+        
+        for transaction, sms_text in batch:
+            merchant = transaction.get('merchant_name', '')
+            amount = transaction.get('amount', 0)
+            transaction_type = transaction.get('transaction_type', 'unknown')
+            account_masked = transaction.get('account_masked', '')
+            date = transaction.get('date', '')
+            user_id = transaction.get('user_id', 1)
+            is_subscription = check_if_subscription(merchant)
+            
+            rows.append((
+                user_id,
+                sms_text,
+                amount,
+                transaction_type,
+                merchant,
+                transaction.get('category', 'Uncategorized'),
+                account_masked,
+                date,
+                transaction.get('confidence_score', 1.0),
+                1 if is_subscription else 0
+            ))
+            
+            # Fold balance changes in order, mirroring update_balance: an
+            # explicit balance resets the account, otherwise credits add and
+            # debits subtract (an unseen account starts at +/- the amount)
+            if account_masked:
+                explicit_balance = extract_balance_from_sms(sms_text)
+                kind = transaction_type.lower()
+                delta = amount if kind == 'credit' else -amount if kind == 'debit' else 0
+                key = (user_id, account_masked)
+                state = balances.get(key)
+                if explicit_balance is not None:
+                    balances[key] = [explicit_balance, explicit_balance, True]
+                elif state is None:
+                    balances[key] = [amount if kind == 'credit' else -amount, delta, False]
+                else:
+                    state[0] += delta
+                    state[1] += delta
+            
+            if is_subscription:
+                if merchant and account_masked:
+                    subscriptions.append((merchant, amount, account_masked, date, calculate_next_due_date(date)))
+            
+            recurring[(merchant, amount, account_masked, user_id)] = date
+        
+        with _transaction(conn):
+            ids = [_insert_returning_id(conn, INSERT_TRANSACTION_SQL, row) for row in rows]
+            
+            conn.executemany(UPSERT_BALANCE_SQL, [
+                (user_id, account, new_value, is_explicit, delta)
+                for (user_id, account), (new_value, delta, is_explicit) in balances.items()
+            ])
+            
+            conn.executemany(UPSERT_SUBSCRIPTION_SQL, subscriptions)
+            
+            for (merchant, amount, account_masked, user_id), date in recurring.items():
+                detect_recurring_transactions(merchant, amount, account_masked, date, user_id, conn=conn)
+        
+        invalidate_transaction_count()
+        invalidate_analytics_cache()
+        return ids
+    except Exception as e:
+        logger.error(f"Error inserting transactions: {e}")
+        return []
 
 def check_if_subscription(merchant_name: str) -> bool:
     """
@@ -234,23 +639,21 @@ def check_if_subscription(merchant_name: str) -> bool:
     Returns:
         True if merchant is a subscription service, False otherwise
     """
+    global _subscription_merchants
     if not merchant_name:
         return False
         
-    conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM subscription_merchants WHERE merchant_name LIKE ?",
-            (f"%{merchant_name.strip()}%",)
-        )
-        result = cursor.fetchone()
-        return result is not None
+        if _subscription_merchants is None:
+            cursor = get_db_connection().execute("SELECT merchant_name FROM subscription_merchants")
+            _subscription_merchants = tuple(row[0].lower() for row in cursor)
+        
+        # Same match as merchant_name LIKE '%name%'
+        name = merchant_name.strip().lower()
+        return any(name in known for known in _subscription_merchants)
     except Exception as e:
-        print(f"Error checking if subscription: {e}")
+        logger.error(f"Error checking if subscription: {e}")
         return False
-    finally:
-        conn.close()
 
 def extract_balance_from_sms(sms_text: str) -> Optional[float]:
     """
@@ -262,28 +665,21 @@ def extract_balance_from_sms(sms_text: str) -> Optional[float]:
     Returns:
         Balance amount if found, None otherwise
     """
-    import re
+    # Every pattern needs "[Bb]alance"; most SMS have none, so skip the regex
+    if 'alance' not in sms_text:
+        return None
     
-    # Look for patterns like "Available balance: Rs.45000" or "Updated balance: Rs.35000"
-    balance_patterns = [
-        r"[Aa]vailable\s+[Bb]alance\s*(?:is|:)?\s*(?:Rs\.?|INR|₹)\s*([0-9,]+(?:\.[0-9]+)?)",
-        r"[Uu]pdated\s+[Bb]alance\s*(?:is|:)?\s*(?:Rs\.?|INR|₹)\s*([0-9,]+(?:\.[0-9]+)?)",
-        r"[Cc]losing\s+[Bb]alance\s*(?:is|:)?\s*(?:Rs\.?|INR|₹)\s*([0-9,]+(?:\.[0-9]+)?)",
-        r"[Bb]alance\s*(?:is|:)?\s*(?:Rs\.?|INR|₹)\s*([0-9,]+(?:\.[0-9]+)?)"
-    ]
-    
-    for pattern in balance_patterns:
-        match = re.search(pattern, sms_text)
-        if match:
-            balance_str = match.group(1).replace(',', '')
-            try:
-                return float(balance_str)
-            except ValueError:
-                continue
+    for match in BALANCE_PATTERN.finditer(sms_text):
+        balance_str = match.group(1).replace(',', '')
+        try:
+            return float(balance_str)
+        except ValueError:
+            continue
     
     return None
 
-def update_balance(account_masked: str, amount: float, transaction_type: str, explicit_balance: Optional[float] = None):
+def update_balance(account_masked: str, amount: float, transaction_type: str, explicit_balance: Optional[float] = None,
+                   conn: Optional[sqlite3.Connection] = None, user_id: int = 1):
     """
     Update account balance based on transaction or explicit balance from SMS
     
@@ -292,67 +688,29 @@ def update_balance(account_masked: str, amount: float, transaction_type: str, ex
         amount: Transaction amount
         transaction_type: Type of transaction (credit/debit)
         explicit_balance: Explicit balance mentioned in SMS (if any)
+        conn: Connection to write on (optional; defaults to the thread's connection)
+        user_id: User ID (default: 1)
     """
     if not account_masked:
         return
         
-    conn = get_db_connection()
+    conn = conn or get_db_connection()
     try:
-        cursor = conn.cursor()
-        
-        # Get current balance for this account
-        cursor.execute(
-            "SELECT current_balance FROM balances WHERE account_masked = ?",
-            (account_masked,)
-        )
-        result = cursor.fetchone()
-        
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
         if explicit_balance is not None:
             # If explicit balance is provided, use it
-            if result:
-                cursor.execute(
-                    "UPDATE balances SET current_balance = ?, last_updated = ? WHERE account_masked = ?",
-                    (explicit_balance, now, account_masked)
-                )
-            else:
-                cursor.execute(
-                    "INSERT INTO balances (account_masked, current_balance, last_updated) VALUES (?, ?, ?)",
-                    (account_masked, explicit_balance, now)
-                )
+            conn.execute(UPSERT_BALANCE_SQL, (user_id, account_masked, explicit_balance, True, 0))
         else:
-            # Calculate new balance based on transaction
-            if result:
-                # Convert sqlite3.Row to dict to avoid mutation issues
-                result_dict = dict(result)
-                current_balance = result_dict['current_balance']
-                new_balance = current_balance
-                
-                if transaction_type.lower() == 'credit':
-                    new_balance += amount
-                elif transaction_type.lower() == 'debit':
-                    new_balance -= amount
-                
-                cursor.execute(
-                    "UPDATE balances SET current_balance = ?, last_updated = ? WHERE account_masked = ?",
-                    (new_balance, now, account_masked)
-                )
-            else:
-                # Initialize with transaction amount
-                initial_balance = amount if transaction_type.lower() == 'credit' else -amount
-                cursor.execute(
-                    "INSERT INTO balances (account_masked, current_balance, last_updated) VALUES (?, ?, ?)",
-                    (account_masked, initial_balance, now)
-                )
-        
-        conn.commit()
+            # New accounts start at +/- the amount; existing ones move by the
+            # signed amount (types other than credit/debit leave them unchanged)
+            kind = transaction_type.lower()
+            initial_balance = amount if kind == 'credit' else -amount
+            delta = amount if kind == 'credit' else -amount if kind == 'debit' else 0
+            conn.execute(UPSERT_BALANCE_SQL, (user_id, account_masked, initial_balance, False, delta))
+        invalidate_analytics_cache()
     except Exception as e:
-        print(f"Error updating balance: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        logger.error(f"Error updating balance: {e}")
 
+@_cached_until_write
 def get_balances(user_id: int = 1) -> List[Dict[str, Any]]:
     """
     Get all account balances for a user
@@ -371,24 +729,16 @@ def get_balances(user_id: int = 1) -> List[Dict[str, Any]]:
             (user_id,)
         )
         
-        balances = []
-        for row in cursor:
-            # Convert sqlite3.Row to dict before accessing
-            row_dict = dict(row)
-            balances.append({
-                "account": row_dict['account_masked'],
-                "balance": row_dict['current_balance'],
-                "last_updated": row_dict['last_updated']
-            })
-        
-        return balances
+        return [
+            {"account": account, "balance": balance, "last_updated": last_updated}
+            for account, balance, last_updated in cursor
+        ]
     except Exception as e:
-        print(f"Error getting balances: {e}")
+        logger.error(f"Error getting balances: {e}")
         return []
-    finally:
-        conn.close()
 
-def save_subscription(merchant: str, amount: float, account_masked: str, transaction_date: str):
+def save_subscription(merchant: str, amount: float, account_masked: str, transaction_date: str,
+                      conn: Optional[sqlite3.Connection] = None):
     """
     Save or update a subscription record
     
@@ -397,45 +747,26 @@ def save_subscription(merchant: str, amount: float, account_masked: str, transac
         amount: Subscription amount
         account_masked: Masked account number
         transaction_date: Date of transaction
+        conn: Connection to write on (optional; defaults to the thread's connection)
     """
     if not merchant or not account_masked:
         return
         
-    conn = get_db_connection()
+    # Calculate next due date (30 days from transaction date)
+    next_due = calculate_next_due_date(transaction_date)
+    
+    conn = conn or get_db_connection()
     try:
-        cursor = conn.cursor()
-        
-        # Calculate next due date (30 days from transaction date)
-        next_due = calculate_next_due_date(transaction_date)
-        
-        # Check if subscription already exists
-        cursor.execute(
-            "SELECT id FROM subscriptions WHERE merchant = ? AND account_masked = ?",
-            (merchant, account_masked)
-        )
-        result = cursor.fetchone()
-        
-        if result:
-            # Update existing subscription
-            cursor.execute('''
-            UPDATE subscriptions 
-            SET amount = ?, last_paid = ?, next_due = ?
-            WHERE id = ?
-            ''', (amount, transaction_date, next_due, result[0]))
-        else:
-            # Create new subscription
-            cursor.execute('''
-            INSERT INTO subscriptions 
-            (merchant, amount, account_masked, last_paid, next_due)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (merchant, amount, account_masked, transaction_date, next_due))
-        
-        conn.commit()
+        conn.execute(UPSERT_SUBSCRIPTION_SQL, (merchant, amount, account_masked, transaction_date, next_due))
+        invalidate_analytics_cache()
     except Exception as e:
-        print(f"Error saving subscription: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        logger.error(f"Error saving subscription: {e}")
+
+@lru_cache(maxsize=4096)
+def _next_due_date(date_str: str) -> str:
+    """Date 30 days after a YYYY-MM-DD date; memoized since batches share dates"""
+    next_due = datetime.datetime.strptime(date_str, "%Y-%m-%d") + datetime.timedelta(days=30)
+    return next_due.strftime("%Y-%m-%d")
 
 def calculate_next_due_date(date_str: str) -> str:
     """
@@ -448,16 +779,15 @@ def calculate_next_due_date(date_str: str) -> str:
         Next due date in YYYY-MM-DD format
     """
     try:
-        date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d")
-        next_due = date_obj + datetime.timedelta(days=30)
-        return next_due.strftime("%Y-%m-%d")
+        return _next_due_date(date_str)
     except Exception as e:
-        print(f"Error calculating next due date: {e}")
+        logger.error(f"Error calculating next due date: {e}")
         # Return date 30 days from today if error
         return (datetime.datetime.now() + datetime.timedelta(days=30)).strftime("%Y-%m-%d")
 
 def detect_recurring_transactions(merchant: str, amount: float, account_masked: str, 
-                                 transaction_date: str, user_id: int = 1) -> bool:
+                                 transaction_date: str, user_id: int = 1,
+                                 conn: Optional[sqlite3.Connection] = None) -> bool:
     """
     Detect if a transaction is recurring based on past transactions
     
@@ -467,53 +797,27 @@ def detect_recurring_transactions(merchant: str, amount: float, account_masked:
         account_masked: Account number (masked)
         transaction_date: Transaction date
         user_id: User ID (default: 1)
+        conn: Connection of an enclosing transaction to join (optional)
         
     Returns:
         True if recurring pattern detected, False otherwise
     """
-    conn = get_db_connection()
+    conn = conn or get_db_connection()
     try:
         # Get previous transactions with the same merchant and similar amount
         amount_margin = amount * 0.05  # 5% margin for amount variations
         
-        cursor = conn.execute('''
-        SELECT date FROM transactions
-        WHERE user_id = ? AND merchant_name = ? AND 
-              ABS(amount - ?) <= ? AND
-              account_masked = ?
-        ORDER BY date DESC
-        LIMIT 3
-        ''', (user_id, merchant, amount, amount_margin, account_masked))
+        intervals, avg_interval, variation = conn.execute(
+            RECURRING_INTERVALS_SQL, (user_id, merchant, amount, amount_margin, account_masked)
+        ).fetchone()
         
-        dates = []
-        for row in cursor:
-            if row['date']:
-                try:
-                    dates.append(datetime.datetime.strptime(row['date'], "%Y-%m-%d"))
-                except Exception:
-                    pass
-        
-        # Need at least 2 previous transactions to detect a pattern
-        if len(dates) < 2:
-            return False
-            
-        # Calculate average interval
-        intervals = []
-        for i in range(len(dates) - 1):
-            interval = abs((dates[i] - dates[i+1]).days)
-            if interval > 0:
-                intervals.append(interval)
-                
+        # Need at least 2 dated transactions (one non-zero gap) to detect a pattern
         if not intervals:
             return False
-            
-        avg_interval = sum(intervals) / len(intervals)
         
         # Check if intervals are consistent (within 20% of each other)
-        if len(intervals) >= 2:
-            variation = max(intervals) - min(intervals)
-            if variation / avg_interval > 0.2:
-                return False
+        if intervals >= 2 and variation / avg_interval > 0.2:
+            return False
         
         # Consider it recurring if average interval is between 25 and 35 days (monthly)
         # or between 6 and 8 days (weekly)
@@ -531,16 +835,15 @@ def detect_recurring_transactions(merchant: str, amount: float, account_masked:
                 'amount': amount,
                 'account_masked': account_masked,
                 'due_date': next_due_date
-            }, user_id)
+            }, user_id, conn=conn)
             
         return is_recurring
     except Exception as e:
-        print(f"Error detecting recurring transactions: {e}")
+        logger.error(f"Error detecting recurring transactions: {e}")
         return False
-    finally:
-        conn.close()
 
-def add_reminder(reminder_data: Dict[str, Any], user_id: int = 1) -> int:
+def add_reminder(reminder_data: Dict[str, Any], user_id: int = 1,
+                 conn: Optional[sqlite3.Connection] = None) -> int:
     """
     Add a payment reminder
     
@@ -552,18 +855,14 @@ def add_reminder(reminder_data: Dict[str, Any], user_id: int = 1) -> int:
             - due_date: Due date
             - account_masked: Account number (masked)
         user_id: User ID (default: 1)
+        conn: Connection to write on (optional; defaults to the thread's connection)
         
     Returns:
         ID of the created reminder
     """
-    conn = get_db_connection()
+    conn = conn or get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT INTO reminders 
-        (user_id, reminder_type, merchant, amount, account_masked, due_date)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
+        return _insert_returning_id(conn, INSERT_REMINDER_SQL, (
             user_id,
             reminder_data.get('reminder_type', 'bill'),
             reminder_data.get('merchant', ''),
@@ -571,15 +870,9 @@ def add_reminder(reminder_data: Dict[str, Any], user_id: int = 1) -> int:
             reminder_data.get('account_masked', ''),
             reminder_data.get('due_date', '')
         ))
-        reminder_id = cursor.lastrowid
-        conn.commit()
-        return reminder_id
     except Exception as e:
-        print(f"Error adding reminder: {e}")
-        conn.rollback()
+        logger.error(f"Error adding reminder: {e}")
         return 0
-    finally:
-        conn.close()
 
 def get_upcoming_reminders(days_ahead: int = 3, user_id: int = 1) -> List[Dict[str, Any]]:
     """
@@ -593,7 +886,6 @@ def get_upcoming_reminders(days_ahead: int = 3, user_id: int = 1) -> List[Dict[s
         List of reminder dictionaries
     """
     conn = get_db_connection()
-    reminders = []
     try:
         today = datetime.datetime.now().strftime("%Y-%m-%d")
         future_date = (datetime.datetime.now() + datetime.timedelta(days=days_ahead)).strftime("%Y-%m-%d")
@@ -605,15 +897,10 @@ def get_upcoming_reminders(days_ahead: int = 3, user_id: int = 1) -> List[Dict[s
         ORDER BY due_date ASC
         ''', (user_id, today, future_date))
         
-        for row in cursor:
-            reminders.append(dict(row))
-            
-        return reminders
+        return [dict(row) for row in cursor.fetchall()]
     except Exception as e:
-        print(f"Error getting upcoming reminders: {e}")
+        logger.error(f"Error getting upcoming reminders: {e}")
         return []
-    finally:
-        conn.close()
 
 def mark_reminder_paid(reminder_id: int, user_id: int = 1) -> bool:
     """
@@ -634,14 +921,10 @@ def mark_reminder_paid(reminder_id: int, user_id: int = 1) -> bool:
         WHERE id = ? AND user_id = ?
         ''', (reminder_id, user_id))
         
-        conn.commit()
         return True
     except Exception as e:
-        print(f"Error marking reminder as paid: {e}")
-        conn.rollback()
+        logger.error(f"Error marking reminder as paid: {e}")
         return False
-    finally:
-        conn.close()
 
 def get_subscriptions() -> List[Dict[str, Any]]:
     """
@@ -659,24 +942,22 @@ def get_subscriptions() -> List[Dict[str, Any]]:
         ORDER BY next_due
         ''')
         
-        subscriptions = []
-        for row in cursor:
-            subscriptions.append({
-                "merchant": row['merchant'],
-                "amount": row['amount'],
-                "account": row['account_masked'],
-                "last_paid": row['last_paid'],
-                "next_due": row['next_due'],
-                "recurring": bool(row['is_recurring'])
-            })
-        
-        return subscriptions
+        return [
+            {
+                "merchant": merchant,
+                "amount": amount,
+                "account": account,
+                "last_paid": last_paid,
+                "next_due": next_due,
+                "recurring": bool(recurring)
+            }
+            for merchant, amount, account, last_paid, next_due, recurring in cursor
+        ]
     except Exception as e:
-        print(f"Error getting subscriptions: {e}")
+        logger.error(f"Error getting subscriptions: {e}")
         return []
-    finally:
-        conn.close()
 
+@_cached_until_write
 def get_financial_summary() -> Dict[str, float]:
     """
     Get a summary of spending by category
@@ -696,18 +977,14 @@ def get_financial_summary() -> Dict[str, float]:
         ORDER BY total DESC
         ''')
         
-        summary = {}
-        for row in cursor:
-            # Convert sqlite3.Row to dict before accessing
-            row_dict = dict(row)
-            summary[row_dict['category']] = row_dict['total']
-        
-        return summary
+        # (category, total) rows map straight onto the summary dict
+        return dict(cursor.fetchall())
     except Exception as e:
-        print(f"Error getting financial summary: {e}")
+        logger.error(f"Error getting financial summary: {e}")
         return {}
-    finally:
-        conn.close()
+
+# Weekday names indexed by strftime('%w') (0 = Sunday)
+WEEKDAYS = ("Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
 
 def get_insights(month: Optional[str] = None) -> Dict[str, Any]:
     """
@@ -721,86 +998,49 @@ def get_insights(month: Optional[str] = None) -> Dict[str, Any]:
     """
     conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        
-        # Date filter condition
-        date_condition = ""
-        params = []
-        
-        if month:
-            date_condition = "WHERE strftime('%Y-%m', date) = ?"
-            params.append(month)
-        
-        # Monthly spend (debits)
-        cursor.execute(f'''
-        SELECT SUM(amount) as total
-        FROM transactions
-        {date_condition + " AND" if date_condition else "WHERE"} transaction_type = 'debit'
-        ''', params)
-        monthly_spend = cursor.fetchone()['total'] or 0
-        
-        # Monthly income (credits)
-        credits_params = params.copy()
-        cursor.execute(f'''
-        SELECT SUM(amount) as total
-        FROM transactions
-        {date_condition + " AND" if date_condition else "WHERE"} transaction_type = 'credit'
-        ''', credits_params)
-        monthly_income = cursor.fetchone()['total'] or 0
-        
-        # Category-wise spend
-        category_params = params.copy()
-        cursor.execute(f'''
-        SELECT category, SUM(amount) as total
-        FROM transactions
-        {date_condition + " AND" if date_condition else "WHERE"} transaction_type = 'debit'
-        GROUP BY category
-        ORDER BY total DESC
-        ''', category_params)
-        
-        category_spend = {}
-        for row in cursor:
-            category_spend[row['category']] = row['total']
-        
-        # Average transaction
-        avg_params = params.copy()
-        cursor.execute(f'''
-        SELECT AVG(amount) as avg_amount
+        # The SQL text is the same with or without a month (?1 IS NULL
+        # disables the filter), so both cases share one cached statement.
+        # Any falsy month, '' included, means all months
+        params = (month or None,)
+        totals = conn.execute('''
+        SELECT
+            COALESCE(SUM(CASE WHEN transaction_type = 'debit' THEN amount END), 0) as spend,
+            COALESCE(SUM(CASE WHEN transaction_type = 'credit' THEN amount END), 0) as income,
+            COALESCE(AVG(CASE WHEN transaction_type = 'debit' THEN amount END), 0) as avg_amount,
+            COALESCE(SUM(CASE WHEN transaction_type = 'debit' AND is_subscription = 1 THEN amount END), 0) as subscription_spend
         FROM transactions
-        {date_condition + " AND" if date_condition else "WHERE"} transaction_type = 'debit'
-        ''', avg_params)
-        avg_transaction = cursor.fetchone()['avg_amount'] or 0
-        
-        # Subscription spend
-        sub_params = params.copy()
-        cursor.execute(f'''
-        SELECT SUM(amount) as total
-        FROM transactions
-        {date_condition + " AND" if date_condition else "WHERE"} is_subscription = 1 AND transaction_type = 'debit'
-        ''', sub_params)
-        subscription_spend = cursor.fetchone()['total'] or 0
+        WHERE ?1 IS NULL OR strftime('%Y-%m', date) = ?1
+        ''', params).fetchone()
+        monthly_spend, monthly_income, avg_transaction, subscription_spend = totals
         
         # Calculate savings rate
         savings_rate = 0
         if monthly_income > 0:
             savings_rate = (monthly_income - monthly_spend) / monthly_income
         
-        # Transactions by day of week
-        dow_params = params.copy()
-        cursor.execute(f'''
-        SELECT strftime('%w', date) as day_of_week, SUM(amount) as total
+        # Category-wise and day-of-week spend, tagged by kind
+        cursor = conn.execute('''
+        SELECT 'category' as kind, category as name, SUM(amount) as total
         FROM transactions
-        {date_condition + " AND" if date_condition else "WHERE"} transaction_type = 'debit'
-        GROUP BY day_of_week
-        ORDER BY day_of_week
-        ''', dow_params)
+        WHERE (?1 IS NULL OR strftime('%Y-%m', date) = ?1) AND transaction_type = 'debit'
+        GROUP BY category
+        UNION ALL
+        SELECT 'day' as kind, strftime('%w', date) as name, SUM(amount) as total
+        FROM transactions
+        WHERE (?1 IS NULL OR strftime('%Y-%m', date) = ?1) AND transaction_type = 'debit'
+        GROUP BY name
+        ORDER BY kind, total DESC
+        ''', params)
         
-        days = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-        day_spend = {day: 0 for day in days}
+        day_spend = dict.fromkeys(WEEKDAYS, 0)
+        category_spend = {}
         
-        for row in cursor:
-            day_index = int(row['day_of_week'])
-            day_spend[days[day_index]] = row['total']
+        for kind, name, total in cursor:
+            if kind == 'category':
+                category_spend[name] = total
+            elif name is not None:
+                # Transactions without a parseable date have no weekday
+                day_spend[WEEKDAYS[int(name)]] = total
         
         return {
             "monthly_spend": monthly_spend,
@@ -813,10 +1053,8 @@ def get_insights(month: Optional[str] = None) -> Dict[str, Any]:
             "month": month if month else datetime.datetime.now().strftime("%Y-%m")
         }
     except Exception as e:
-        print(f"Error getting insights: {e}")
+        logger.error(f"Error getting insights: {e}")
         return {}
-    finally:
-        conn.close()
 
 def save_archetype(archetype: str, user_id: int = 1):
     """
@@ -832,12 +1070,9 @@ def save_archetype(archetype: str, user_id: int = 1):
         INSERT INTO archetypes (user_id, archetype)
         VALUES (?, ?)
         ''', (user_id, archetype))
-        conn.commit()
+        invalidate_analytics_cache()
     except Exception as e:
-        print(f"Error saving archetype: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        logger.error(f"Error saving archetype: {e}")
 
 def log_recommendation_click(product_name: str, user_id: int = 1):
     """
@@ -853,127 +1088,179 @@ def log_recommendation_click(product_name: str, user_id: int = 1):
         INSERT INTO recommendation_clicks (product_name, user_id)
         VALUES (?, ?)
         ''', (product_name, user_id))
-        conn.commit()
+        invalidate_analytics_cache()
     except Exception as e:
-        print(f"Error logging recommendation click: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        logger.error(f"Error logging recommendation click: {e}")
 
 def get_analytics_data() -> Dict[str, Any]:
     """
     Get analytics data for the dashboard
     
+    Results are cached for ANALYTICS_TTL_SECONDS; callers share the returned
+    dictionary and should not modify it.
+    
     Returns:
         Dictionary with analytics data
     """
+    # Analytics read inside a write transaction include its uncommitted
+    # writes, so they are neither cached nor served from the cache
+    if get_db_connection().in_transaction:
+        return _query_analytics_data()
+    
+    with _analytics_lock:
+        if _analytics_cache is not None and _analytics_cache[0] > time.monotonic():
+            return _analytics_cache[1]
+        return _refresh_analytics_cache()
+
+def _refresh_analytics_cache() -> Dict[str, Any]:
+    """Recompute and cache the analytics; the caller holds _analytics_lock"""
+    global _analytics_cache
+    analytics = _query_analytics_data()
+    if analytics:
+        _analytics_cache = (time.monotonic() + ANALYTICS_TTL_SECONDS, analytics)
+    return analytics
+
+def start_analytics_refresher(interval: float = ANALYTICS_TTL_SECONDS / 2):
+    """
+    Keep the analytics cache warm from a daemon thread
+    
+    The cache is recomputed every interval seconds (before its TTL runs out),
+    so dashboard requests read it instead of running the queries themselves.
+    Only a write in between makes a request recompute inline. Calling this
+    more than once has no effect.
+    
+    Args:
+        interval: Seconds between refreshes (default: half the cache TTL)
+    """
+    global _analytics_refresher
+    if _analytics_refresher is not None:
+        return
+    
+    def refresh_loop():
+        while True:
+            with _analytics_lock:
+                _refresh_analytics_cache()
+            time.sleep(interval)
+    
+    _analytics_refresher = threading.Thread(target=refresh_loop, name="analytics-refresher", daemon=True)
+    _analytics_refresher.start()
+
+def invalidate_analytics_cache():
+    """Drop cached analytics and memoized reads; call after writing to any table they summarise"""
+    global _analytics_cache, _read_version
+    with _analytics_lock:
+        _analytics_cache = None
+    with _read_version_lock:
+        _read_version += 1
+
+def _query_analytics_data() -> Dict[str, Any]:
+    """Compute the get_analytics_data() dictionary from the database"""
     conn = get_db_connection()
     try:
-        # Get archetype distribution
-        archetype_cursor = conn.execute('''
-        SELECT archetype, COUNT(*) as count
+        # Archetype counts, category spend and the top 5 clicked
+        # recommendations in one round-trip, tagged by kind
+        cursor = conn.execute('''
+        SELECT 'archetype' as kind, archetype as name, COUNT(*) as total
         FROM archetypes
         GROUP BY archetype
-        ORDER BY count DESC
-        ''')
-        
-        archetypes = {}
-        for row in archetype_cursor:
-            archetypes[row['archetype']] = row['count']
-        
-        # Get category spending totals
-        category_cursor = conn.execute('''
-        SELECT category, SUM(amount) as total
+        UNION ALL
+        SELECT 'category' as kind, category as name, SUM(amount) as total
         FROM transactions
         WHERE transaction_type = 'debit'
         GROUP BY category
-        ORDER BY total DESC
-        ''')
-        
-        categories = {}
-        for row in category_cursor:
-            categories[row['category']] = row['total']
-        
-        # Get top clicked recommendations
-        recommendation_cursor = conn.execute('''
-        SELECT product_name, COUNT(*) as clicks
-        FROM recommendation_clicks
-        GROUP BY product_name
-        ORDER BY clicks DESC
-        LIMIT 5
-        ''')
-        
-        recommendations = {}
-        for row in recommendation_cursor:
-            recommendations[row['product_name']] = row['clicks']
-        
-        # Get subscription stats
-        subscription_cursor = conn.execute('''
-        SELECT COUNT(*) as count, SUM(amount) as total
-        FROM subscriptions
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'recommendation' as kind, product_name as name, COUNT(*) as total
+            FROM recommendation_clicks
+            GROUP BY product_name
+            ORDER BY total DESC
+            LIMIT 5
+        )
+        ORDER BY kind, total DESC
         ''')
         
-        sub_row = subscription_cursor.fetchone()
-        subscription_stats = {
-            "count": sub_row['count'],
-            "total": sub_row['total'] if sub_row['total'] else 0
-        }
+        groups: Dict[str, Dict[str, Any]] = {'archetype': {}, 'category': {}, 'recommendation': {}}
+        for kind, name, total in cursor:
+            groups[kind][name] = total
         
-        # Get balance stats
-        balance_cursor = conn.execute('''
-        SELECT COUNT(*) as count, SUM(current_balance) as total
-        FROM balances
-        ''')
-        
-        bal_row = balance_cursor.fetchone()
-        balance_stats = {
-            "count": bal_row['count'],
-            "total": bal_row['total'] if bal_row['total'] else 0
-        }
+        # Subscription, balance and spending totals in one row
+        totals = conn.execute('''
+        SELECT
+            (SELECT COUNT(*) FROM subscriptions) as sub_count,
+            (SELECT COALESCE(SUM(amount), 0) FROM subscriptions) as sub_total,
+            (SELECT COUNT(*) FROM balances) as bal_count,
+            (SELECT COALESCE(SUM(current_balance), 0) FROM balances) as bal_total,
+            (SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE transaction_type = 'debit') as tx_spend
+        ''').fetchone()
         
         return {
-            "archetype_distribution": archetypes,
-            "category_spending": categories,
-            "top_recommendations": recommendations,
-            "subscription_stats": subscription_stats,
-            "balance_stats": balance_stats,
+            "archetype_distribution": groups['archetype'],
+            "category_spending": groups['category'],
+            "top_recommendations": groups['recommendation'],
+            "subscription_stats": {"count": totals['sub_count'], "total": totals['sub_total']},
+            "balance_stats": {"count": totals['bal_count'], "total": totals['bal_total']},
             "total_transactions": get_transaction_count(),
-            "total_spending": get_total_spending()
+            "total_spending": totals['tx_spend']
         }
     except Exception as e:
-        print(f"Error getting analytics data: {e}")
+        logger.error(f"Error getting analytics data: {e}")
         return {}
-    finally:
-        conn.close()
 
-def get_transaction_count() -> int:
-    """Get the total number of transactions"""
+def get_transaction_count(approximate: bool = False) -> int:
+    """
+    Get the total number of transactions
+    
+    Args:
+        approximate: Accept the row estimate from the last ANALYZE (sqlite_stat1)
+            for display-only counters. sqlite_stat1 is missing or has no
+            transactions row until ANALYZE / PRAGMA optimize has run on a
+            non-empty table, and the exact count is returned then
+    """
+    if approximate:
+        try:
+            row = get_db_connection().execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = 'transactions' LIMIT 1"
+            ).fetchone()
+            if row:
+                # The first number of every stat entry is the table's row count
+                return int(row['stat'].split()[0])
+        except sqlite3.Error:
+            pass  # No ANALYZE has run yet
+    
+    return _count_transactions()
+
+# SQLite keeps no row count, so COUNT(*) scans; the count is memoized like the
+# other dashboard reads and recounted once the database changes
+@_cached_until_write
+def _count_transactions() -> int:
     conn = get_db_connection()
     try:
         cursor = conn.execute('SELECT COUNT(*) as count FROM transactions')
         return cursor.fetchone()['count']
     except Exception as e:
-        print(f"Error getting transaction count: {e}")
+        logger.error(f"Error getting transaction count: {e}")
         return 0
-    finally:
-        conn.close()
 
+def invalidate_transaction_count():
+    """Drop the memoized transaction count; call after writing to transactions"""
+    global _read_version
+    with _read_version_lock:
+        _read_version += 1
+
+@_cached_until_write
 def get_total_spending() -> float:
     """Get the total amount spent (debit transactions)"""
     conn = get_db_connection()
     try:
         cursor = conn.execute('''
-        SELECT SUM(amount) as total
+        SELECT COALESCE(SUM(amount), 0) as total
         FROM transactions
         WHERE transaction_type = 'debit'
         ''')
-        result = cursor.fetchone()
-        return result['total'] if result['total'] else 0
+        return cursor.fetchone()['total']
     except Exception as e:
-        print(f"Error getting total spending: {e}")
+        logger.error(f"Error getting total spending: {e}")
         return 0
-    finally:
-        conn.close()
 
 def set_user_goal(goal_data: Dict[str, Any], user_id: int = 1) -> int:
     """
@@ -991,28 +1278,45 @@ def set_user_goal(goal_data: Dict[str, Any], user_id: int = 1) -> int:
     """
     conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT INTO user_goals 
-        (user_id, goal_type, target_amount, target_date, status, current_amount)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            user_id,
-            goal_data.get('goal_type', 'Savings'),
-            goal_data.get('target_amount', 0),
-            goal_data.get('target_date', ''),
-            'active',
-            goal_data.get('current_amount', 0)
-        ))
-        goal_id = cursor.lastrowid
-        conn.commit()
-        return goal_id
+        return _insert_returning_id(conn, INSERT_GOAL_SQL, _goal_row(goal_data, user_id))
     except Exception as e:
-        print(f"Error setting user goal: {e}")
-        conn.rollback()
+        logger.error(f"Error setting user goal: {e}")
         return 0
-    finally:
-        conn.close()
+
+def _goal_row(goal_data: Dict[str, Any], user_id: int) -> Tuple[Any, ...]:
+    """INSERT_GOAL_SQL parameters for a goal dictionary"""
+    return (
+        user_id,
+        goal_data.get('goal_type', 'Savings'),
+        goal_data.get('target_amount', 0),
+        goal_data.get('target_date', ''),
+        'active',
+        goal_data.get('current_amount', 0)
+    )
+
+def set_user_goals_bulk(goals: List[Dict[str, Any]], user_id: int = 1) -> List[int]:
+    """
+    Set many financial goals for a user in a single database transaction
+    
+    Args:
+        goals: List of goal dictionaries (same keys as set_user_goal)
+        user_id: User ID (default: 1)
+        
+    Returns:
+        IDs of the created goals, in input order (empty on error)
+    """
+    if not goals:
+        return []
+        
+    conn = get_db_connection()
+    try:
+        rows = [_goal_row(goal_data, user_id) for goal_data in goals]
+        
+        with _transaction(conn):
+            return [_insert_returning_id(conn, INSERT_GOAL_SQL, row) for row in rows]
+    except Exception as e:
+        logger.error(f"Error setting user goals: {e}")
+        return []
 
 def get_user_goals(user_id: int = 1, include_achieved: bool = False) -> List[Dict[str, Any]]:
     """
@@ -1026,44 +1330,23 @@ def get_user_goals(user_id: int = 1, include_achieved: bool = False) -> List[Dic
         List of goals as dictionaries
     """
     conn = get_db_connection()
-    goals = []
     try:
-        status_filter = "" if include_achieved else "AND status = 'active'"
-        
-        cursor = conn.execute(f'''
-        SELECT id, goal_type, target_amount, current_amount, target_date, status, created_at
-        FROM user_goals
-        WHERE user_id = ? {status_filter}
-        ORDER BY created_at DESC
-        ''', (user_id,))
-        
-        for row in cursor:
-            goal = dict(row)
-            
-            # Calculate progress percentage
-            if goal['target_amount'] > 0:
-                goal['progress'] = (goal['current_amount'] / goal['target_amount']) * 100
-            else:
-                goal['progress'] = 0
-                
-            # Calculate days remaining if target_date exists
-            if goal['target_date']:
-                try:
-                    target_date = datetime.datetime.strptime(goal['target_date'], "%Y-%m-%d")
-                    today = datetime.datetime.now()
-                    days_remaining = (target_date - today).days
-                    goal['days_remaining'] = max(0, days_remaining)
-                except Exception:
-                    goal['days_remaining'] = None
-            
-            goals.append(goal)
-            
-        return goals
+        cursor = conn.execute(USER_GOALS_SQL if include_achieved else ACTIVE_USER_GOALS_SQL, (user_id,))
+        
+        # progress and days_remaining come computed from SQL; unpacking the
+        # known column order is cheaper than dict(row) on sqlite3.Row
+        return [
+            {
+                "id": goal_id, "goal_type": goal_type, "target_amount": target_amount,
+                "current_amount": current_amount, "target_date": target_date, "status": status,
+                "created_at": created_at, "progress": progress, "days_remaining": days_remaining
+            }
+            for (goal_id, goal_type, target_amount, current_amount, target_date, status,
+                 created_at, progress, days_remaining) in cursor.fetchall()
+        ]
     except Exception as e:
-        print(f"Error getting user goals: {e}")
+        logger.error(f"Error getting user goals: {e}")
         return []
-    finally:
-        conn.close()
 
 def update_goal_progress(goal_id: int, amount_added: float, user_id: int = 1) -> bool:
     """
@@ -1079,39 +1362,26 @@ def update_goal_progress(goal_id: int, amount_added: float, user_id: int = 1) ->
     """
     conn = get_db_connection()
     try:
-        # Get current amount
+        # Add the amount and re-evaluate the status in one statement; the
+        # right-hand side sees the pre-update current_amount
         cursor = conn.execute('''
-        SELECT current_amount, target_amount FROM user_goals
-        WHERE id = ? AND user_id = ?
-        ''', (goal_id, user_id))
-        
-        result = cursor.fetchone()
-        if not result:
-            print(f"Goal not found: {goal_id}")
-            return False
-            
-        current_amount = result['current_amount'] + amount_added
-        target_amount = result['target_amount']
-        
-        # Update status if target reached
-        status = 'achieved' if current_amount >= target_amount else 'active'
-        
-        # Update goal
-        conn.execute('''
         UPDATE user_goals 
-        SET current_amount = ?, status = ?, modified_at = CURRENT_TIMESTAMP
-        WHERE id = ? AND user_id = ?
-        ''', (current_amount, status, goal_id, user_id))
+        SET current_amount = current_amount + ?1,
+            status = CASE WHEN current_amount + ?1 >= target_amount THEN 'achieved' ELSE 'active' END,
+            modified_at = CURRENT_TIMESTAMP
+        WHERE id = ?2 AND user_id = ?3
+        ''', (amount_added, goal_id, user_id))
+        
+        if cursor.rowcount == 0:
+            logger.warning(f"Goal not found: {goal_id}")
+            return False
         
-        conn.commit()
         return True
     except Exception as e:
-        print(f"Error updating goal progress: {e}")
-        conn.rollback()
+        logger.error(f"Error updating goal progress: {e}")
         return False
-    finally:
-        conn.close()
 
+@_cached_until_write
 def get_total_income(month: Optional[str] = None) -> float:
     """
     Get total income (credits) for a user
@@ -1124,31 +1394,28 @@ def get_total_income(month: Optional[str] = None) -> float:
     """
     conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        
-        # Date filter condition
-        date_condition = ""
-        params = []
-        
         if month:
-            date_condition = "AND strftime('%Y-%m', date) = ?"
-            params.append(month)
-        
-        # Get total credits
-        cursor.execute(f'''
-        SELECT SUM(amount) as total
-        FROM transactions
-        WHERE transaction_type = 'credit' {date_condition}
-        ''', params)
+            # A [first of month, first of next month) range on the raw date
+            # keeps the (transaction_type, date, amount) index usable
+            start = datetime.datetime.strptime(month, "%Y-%m")
+            end = (start + datetime.timedelta(days=32)).replace(day=1)
+            cursor = conn.execute('''
+            SELECT COALESCE(SUM(amount), 0) as total
+            FROM transactions
+            WHERE transaction_type = 'credit' AND date >= ? AND date < ?
+            ''', (start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")))
+        else:
+            cursor = conn.execute('''
+            SELECT COALESCE(SUM(amount), 0) as total
+            FROM transactions
+            WHERE transaction_type = 'credit'
+            ''')
         
-        result = cursor.fetchone()
-        return result['total'] or 0
+        return cursor.fetchone()['total']
     except Exception as e:
-        print(f"Error getting total income: {e}")
+        logger.error(f"Error getting total income: {e}")
         return 0
-    finally:
-        conn.close()
 
-# Initialize database when the module is imported
-if not os.path.exists(DB_FILE) or os.path.getsize(DB_FILE) == 0:
-    init_db() 
\ No newline at end of file
+# Initialize (or migrate) the database when the module is imported; init_db is
+# idempotent, so existing databases also pick up added columns and indexes
+init_db()
@@ -1,7 +1,54 @@
 #!/usr/bin/env python3
 
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+
 import db
 
+# Tables as created before transactions.user_id and user_goals.progress existed
+PRE_MIGRATION_SCHEMA = '''
+CREATE TABLE transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sms_text TEXT NOT NULL,
+    amount REAL NOT NULL,
+    transaction_type TEXT NOT NULL,
+    merchant_name TEXT,
+    category TEXT NOT NULL DEFAULT 'Uncategorized',
+    account_masked TEXT,
+    date TEXT,
+    confidence_score REAL DEFAULT 1.0,
+    is_subscription INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE user_goals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER DEFAULT 1,
+    goal_type TEXT NOT NULL,
+    target_amount REAL NOT NULL,
+    current_amount REAL DEFAULT 0.0,
+    target_date TEXT,
+    status TEXT DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+'''
+
+def run_against_existing_db(script: str, seed_sql: str = "") -> str:
+    """Run script in a fresh interpreter whose working directory holds a pre-migration database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, db.DB_FILE))
+        conn.executescript(PRE_MIGRATION_SCHEMA + seed_sql)
+        conn.close()
+        
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(db.__file__)))
+        result = subprocess.run([sys.executable, "-c", script], cwd=tmp, env=env,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+
 def test_balance_extraction():
     """Test extracting balance from SMS messages"""
     print("=== TESTING BALANCE EXTRACTION ===")
@@ -24,7 +71,7 @@ def test_balance_updates():
     print("\n=== TESTING BALANCE UPDATES ===")
     
     # Initialize the database
-    db.init_db()
+    db.reset_db()
     print("Database initialized.")
     
     # Test updating with explicit balance
@@ -45,10 +92,238 @@ def test_balance_updates():
     for bal in balances:
         print(f"Account: {bal['account']}  |  Balance: {bal['balance']}  |  Last Updated: {bal['last_updated']}")
 
+def test_bulk_insert():
+    """Test inserting a batch of transactions in one call"""
+    print("\n=== TESTING BULK INSERT ===")
+    
+    db.reset_db()
+    batch = [
+        ({"amount": 5000, "transaction_type": "credit", "merchant_name": "Salary", "account_masked": "xxxx1234", "date": "2023-04-01"},
+         "Rs.5000 credited to your account xxxx1234. Available balance: Rs.50000."),
+        ({"amount": 649, "transaction_type": "debit", "merchant_name": "Netflix", "account_masked": "xxxx1234", "date": "2023-04-02"},
+         "Rs.649 debited from xxxx1234 for Netflix."),
+        ({"amount": 250, "transaction_type": "debit", "merchant_name": "Swiggy", "account_masked": "xxxx5678", "date": "2023-04-02"},
+         "Rs.250 spent at Swiggy from xxxx5678."),
+    ]
+    
+    ids = db.insert_transactions(batch)
+    print(f"Inserted transaction IDs: {ids}")
+    assert ids == list(range(ids[0], ids[0] + len(batch)))
+    
+    # Each returned id belongs to the row inserted from the same batch entry
+    conn = db.get_db_connection()
+    for txn_id, (txn, sms_text) in zip(ids, batch):
+        row = conn.execute("SELECT amount, sms_text FROM transactions WHERE id = ?", (txn_id,)).fetchone()
+        assert (row["amount"], row["sms_text"]) == (txn["amount"], sms_text)
+    
+    balances = db.get_balances()
+    for bal in balances:
+        print(f"Account: {bal['account']}  |  Balance: {bal['balance']}")
+    # xxxx1234 starts from the balance in the salary SMS, less the Netflix debit
+    assert {bal["account"]: bal["balance"] for bal in balances} == {"xxxx1234": 49351.0, "xxxx5678": -250.0}
+    
+    subscriptions = db.get_subscriptions()
+    for sub in subscriptions:
+        print(f"Subscription: {sub['merchant']}  |  Amount: {sub['amount']}  |  Next due: {sub['next_due']}")
+    assert [(sub["merchant"], sub["amount"], sub["account"], sub["next_due"]) for sub in subscriptions] == [
+        ("Netflix", 649.0, "xxxx1234", "2023-05-02")
+    ]
+
+def test_import_migrates_existing_db():
+    """Test that importing db adds missing columns to an existing database"""
+    print("\n=== TESTING MIGRATION OF AN EXISTING DATABASE ===")
+    
+    output = run_against_existing_db(
+        "import db\n"
+        "print(db.insert_transaction({'amount': 100, 'transaction_type': 'debit', "
+        "'account_masked': 'xxxx1234', 'date': '2023-04-01'}, 'Rs.100 debited'))\n"
+        "print(db.get_total_spending())"
+    )
+    print(output)
+    assert output.splitlines()[-2:] == ["1", "100.0"]
+
+def test_goals_on_migrated_db():
+    """Test that goals saved before the progress column existed are readable after import"""
+    print("\n=== TESTING GOALS ON A MIGRATED DATABASE ===")
+    
+    output = run_against_existing_db(
+        "import db\n"
+        "print(sorted((g['goal_type'], g['progress']) for g in db.get_user_goals(include_achieved=True)))\n"
+        "print([(g['goal_type'], g['progress']) for g in db.get_user_goals()])",
+        seed_sql="INSERT INTO user_goals (goal_type, target_amount, current_amount, status) "
+                 "VALUES ('savings', 1000, 250, 'active'), ('travel', 500, 500, 'achieved');"
+    )
+    print(output)
+    assert output.splitlines()[-2:] == [
+        "[('savings', 25.0), ('travel', 100.0)]",
+        "[('savings', 25.0)]",
+    ]
+
+def test_failed_commit_rolls_back():
+    """Test that a transaction whose COMMIT fails is rolled back and the connection stays usable"""
+    print("\n=== TESTING FAILED COMMIT ===")
+    
+    db.reset_db()
+    conn = db.get_db_connection()
+    conn.executescript('''
+    CREATE TABLE parent (id INTEGER PRIMARY KEY);
+    CREATE TABLE child (
+        parent_id INTEGER REFERENCES parent(id) DEFERRABLE INITIALLY DEFERRED
+    );
+    ''')
+    
+    # The deferred foreign key is only checked, and fails, at COMMIT
+    try:
+        with db.write_transaction() as tx:
+            tx.execute("INSERT INTO child (parent_id) VALUES (42)")
+    except sqlite3.IntegrityError as e:
+        print(f"COMMIT failed as expected: {e}")
+    else:
+        raise AssertionError("COMMIT should have failed")
+    
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM child").fetchone()[0] == 0
+    
+    with db.write_transaction() as tx:
+        tx.execute("INSERT INTO parent (id) VALUES (42)")
+        tx.execute("INSERT INTO child (parent_id) VALUES (42)")
+    assert conn.execute("SELECT COUNT(*) FROM child").fetchone()[0] == 1
+
+def test_nested_block_rolls_back_to_savepoint():
+    """Test that a failed nested block undoes only its own writes"""
+    print("\n=== TESTING NESTED WRITE ROLLBACK ===")
+    
+    db.reset_db()
+    with db.write_transaction() as conn:
+        db.update_balance("xxxx1234", 100, "credit")
+        try:
+            with db.write_transaction():
+                db.update_balance("xxxx5678", 200, "credit")
+                raise ValueError("abort the inner block")
+        except ValueError:
+            pass
+    
+    balances = {bal["account"]: bal["balance"] for bal in db.get_balances()}
+    print(balances)
+    assert balances == {"xxxx1234": 100.0}
+    assert not conn.in_transaction
+
+def test_memoized_reads_see_other_writers():
+    """Test that memoized reads notice writes from other connections and hand out copies"""
+    print("\n=== TESTING MEMOIZED READS ===")
+    
+    db.reset_db()
+    db.update_balance("xxxx1234", 100, "credit")
+    balances = db.get_balances()
+    assert [bal["balance"] for bal in balances] == [100.0]
+    
+    # Mutating a returned result must not leak into the cache
+    balances[0]["balance"] = -1
+    assert db.get_balances()[0]["balance"] == 100.0
+    
+    # A write from another connection, as the CLI or another API worker would make
+    other = sqlite3.connect(db.DB_FILE)
+    with other:
+        other.execute("UPDATE balances SET current_balance = 250 WHERE account_masked = 'xxxx1234'")
+    other.close()
+    assert db.get_balances()[0]["balance"] == 250.0
+
+def test_transaction_count():
+    """Test the memoized and approximate transaction counts"""
+    print("\n=== TESTING TRANSACTION COUNT ===")
+    
+    db.reset_db()
+    for amount in (100, 200):
+        db.insert_transaction({"amount": amount, "transaction_type": "debit",
+                               "account_masked": "xxxx1234", "date": "2023-05-01"}, "")
+    assert db.get_transaction_count() == 2
+    # Without an ANALYZE sqlite_stat1 holds no estimate, so the exact count is used
+    assert db.get_transaction_count(approximate=True) == 2
+    
+    # A row added by another connection invalidates the memoized count
+    other = sqlite3.connect(db.DB_FILE)
+    with other:
+        other.execute("INSERT INTO transactions (sms_text, amount, transaction_type, date) "
+                      "SELECT sms_text, 300, transaction_type, date FROM transactions LIMIT 1")
+        other.execute("ANALYZE")
+    other.close()
+    assert db.get_transaction_count() == 3
+    assert db.get_transaction_count(approximate=True) == 3
+
+def test_insights_month_filter():
+    """Test that insights without a month (None or empty) cover all months"""
+    print("\n=== TESTING INSIGHTS MONTH FILTER ===")
+    
+    db.reset_db()
+    for amount, date in ((100, "2023-05-01"), (250, "2023-06-01")):
+        db.insert_transaction({"amount": amount, "transaction_type": "debit",
+                               "account_masked": "xxxx1234", "date": date}, "")
+    assert db.get_insights("2023-05")["monthly_spend"] == 100.0
+    assert db.get_insights()["monthly_spend"] == 350.0
+    assert db.get_insights("")["monthly_spend"] == 350.0
+
+def test_bulk_goals():
+    """Test that set_user_goals_bulk returns the id of each goal it created"""
+    print("\n=== TESTING BULK GOALS ===")
+    
+    db.reset_db()
+    goals = [
+        {"goal_type": "savings", "target_amount": 1000, "target_date": "2030-01-01"},
+        {"goal_type": "travel", "target_amount": 500, "target_date": "2030-06-01"},
+    ]
+    ids = db.set_user_goals_bulk(goals)
+    print(f"Inserted goal IDs: {ids}")
+    
+    goal_types = {goal["id"]: goal["goal_type"] for goal in db.get_user_goals()}
+    assert [goal_types[goal_id] for goal_id in ids] == ["savings", "travel"]
+
+def test_rolled_back_reads_are_not_cached():
+    """Test that reads made inside a write_transaction that rolls back are not served afterwards"""
+    print("\n=== TESTING READS IN A ROLLED BACK TRANSACTION ===")
+    
+    db.reset_db()
+    db.insert_transaction({"amount": 100, "transaction_type": "credit",
+                           "account_masked": "xxxx1234", "date": "2023-05-01"}, "")
+    analytics = db.get_analytics_data()
+    
+    try:
+        with db.write_transaction() as conn:
+            conn.execute("UPDATE balances SET current_balance = 1000 WHERE account_masked = 'xxxx1234'")
+            conn.execute("INSERT INTO transactions (sms_text, amount, transaction_type, date) "
+                         "SELECT sms_text, 500, 'debit', date FROM transactions LIMIT 1")
+            db.save_archetype("Saver")
+            assert db.get_balances()[0]["balance"] == 1000.0
+            assert db.get_transaction_count() == 2
+            assert db.get_analytics_data()["archetype_distribution"] == {"Saver": 1}
+            
+            # Other threads only see committed analytics in the meantime
+            seen = []
+            reader = threading.Thread(target=lambda: seen.append(db.get_analytics_data()))
+            reader.start()
+            reader.join()
+            assert seen == [analytics]
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    
+    assert db.get_balances()[0]["balance"] == 100.0
+    assert db.get_transaction_count() == 1
+    assert db.get_analytics_data() == analytics
+
 def main():
     """Run all tests"""
     test_balance_extraction()
     test_balance_updates()
+    test_bulk_insert()
+    test_import_migrates_existing_db()
+    test_goals_on_migrated_db()
+    test_failed_commit_rolls_back()
+    test_nested_block_rolls_back_to_savepoint()
+    test_memoized_reads_see_other_writers()
+    test_transaction_count()
+    test_insights_month_filter()
+    test_bulk_goals()
+    test_rolled_back_reads_are_not_cached()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
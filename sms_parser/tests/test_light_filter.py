@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 import unittest
-from enhanced_sms_parser import light_filter, parse_sms
+from enhanced_sms_parser import light_filter, light_filter_batch, parse_sms
 
 class TestLightFilter(unittest.TestCase):
     """Test cases for the light filter functionality"""
@@ -77,6 +77,19 @@ class TestLightFilter(unittest.TestCase):
         for sms in mixed_content_sms:
             self.assertTrue(light_filter(sms), f"Incorrectly filtered mixed content: {sms}")
     
+    def test_batch_matches_single(self):
+        """Test that light_filter_batch returns the per-SMS verdicts in order"""
+        
+        sms_batch = [
+            "Your a/c XX1234 is debited with Rs.1500.00 for Swiggy order on 2023-07-15.",
+            "Your OTP for login is 123456. Valid for 10 minutes.",
+            "",
+            "Your recharge of Rs.199 was successful. Validity: 28 days."
+        ]
+        
+        self.assertEqual(light_filter_batch(sms_batch), [light_filter(sms) for sms in sms_batch])
+        self.assertEqual(light_filter_batch([]), [])
+    
     def test_integration_with_parse_sms(self):
         """Test the integration of light filter with parse_sms function"""
         